@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination shared by the catalog and dashboard views.
+
+Pages are fetched with a WHERE clause on the last seen sort key instead of
+OFFSET, and no COUNT(*) is issued: one extra row is fetched to know whether
+another page exists.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _serialize(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(ordering, values, direction):
+    payload = {
+        'o': ','.join(ordering),
+        'k': [_serialize(v) for v in values],
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, ordering):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload['k'], payload['d']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+
+    # التوكن يخص ترتيباً آخر (غيّر المستخدم الفرز) أو تم التلاعب به
+    if payload.get('o') != ','.join(ordering) or direction not in ('n', 'p') \
+            or len(values) != len(ordering):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+def _keyset_filter(ordering, values, forward):
+    """(a, b) > (x, y) expanded as: a > x OR (a = x AND b > y)."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate(queryset, ordering, cursor=None, per_page=12):
+    """
+    Return a KeysetPage of ``queryset`` sorted by ``ordering``.
+
+    ``ordering`` must end with a unique, non-null column (normally ``id``)
+    so that every row has a distinct position. Fields must be local columns
+    or annotations (no ``__`` traversal).
+    An invalid or stale cursor silently falls back to the first page.
+    """
+    ordering = tuple(ordering)
+    values, direction = None, 'n'
+    if cursor:
+        try:
+            values, direction = decode_cursor(cursor, ordering)
+        except InvalidCursor:
+            values, direction = None, 'n'
+
+    forward = direction == 'n'
+    qs = queryset.order_by(*(ordering if forward else [_flip(f) for f in ordering]))
+    if values is not None:
+        qs = qs.filter(_keyset_filter(ordering, values, forward))
+
+    rows = list(qs[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def key(obj):
+        if isinstance(obj, dict):
+            return [obj[f.lstrip('-')] for f in ordering]
+        return [getattr(obj, f.lstrip('-')) for f in ordering]
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if (forward and has_more) or not forward:
+            next_cursor = encode_cursor(ordering, key(rows[-1]), 'n')
+        if (not forward and has_more) or (forward and values is not None):
+            previous_cursor = encode_cursor(ordering, key(rows[0]), 'p')
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def cursor_querystring(request, cursor, param='cursor'):
+    """Current GET parameters with the cursor swapped, for next/prev links."""
+    params = request.GET.copy()
+    params.pop(param, None)
+    if cursor:
+        params[param] = cursor
+    return params.urlencode()
@@ -0,0 +1,55 @@
+"""
+EXPLAIN-based checks for the hot queries (used by the apps' tests).
+
+``QueryPlanTestCase.assertIndexedPlan(queryset)`` runs EXPLAIN on the
+queryset and fails, printing the plan, when it reads a table with a
+sequential scan or (with ``ordered=True``) sorts the rows instead of
+reading them in index order. Both SQLite (``EXPLAIN QUERY PLAN``) and
+PostgreSQL plans are understood.
+
+The tests seed enough rows and run ANALYZE first (``analyze``), so that
+the planner's choice reflects a large table rather than an empty one.
+"""
+import re
+
+from django.db import connection
+from django.test import TestCase
+
+# SQLite: "SCAN vehicles_car" (بدون USING INDEX)، PostgreSQL: "Seq Scan on vehicles_car"
+_SQLITE_SCAN = re.compile(r'\bSCAN (?!CONSTANT )(\w+)(?! USING)(?:\s|$)')
+_POSTGRES_SCAN = re.compile(r'\bSeq Scan on (\w+)')
+_SQLITE_SORT = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+_POSTGRES_SORT = re.compile(r'(?:^|->)\s*(?:Incremental )?Sort\b')
+
+
+def analyze():
+    """Refresh the planner statistics after seeding."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def sequential_scans(plan):
+    """Tables read with a full scan in ``plan``."""
+    pattern = _POSTGRES_SCAN if connection.vendor == 'postgresql' else _SQLITE_SCAN
+    return sorted({match.group(1) for match in pattern.finditer(plan)})
+
+
+def sorts(plan):
+    """Whether ``plan`` sorts rows rather than reading them in index order."""
+    pattern = _POSTGRES_SORT if connection.vendor == 'postgresql' else _SQLITE_SORT
+    return any(pattern.search(line) for line in plan.splitlines())
+
+
+class QueryPlanTestCase(TestCase):
+
+    def assertIndexedPlan(self, queryset, ordered=False, allow_scans=()):
+        """
+        Fail when ``queryset``'s plan scans a table sequentially (other than
+        ``allow_scans``) or, with ``ordered``, sorts instead of using an index.
+        """
+        plan = queryset.explain()
+        scans = [table for table in sequential_scans(plan) if table not in allow_scans]
+        if scans:
+            self.fail(f'Sequential scan on {", ".join(scans)}:\n{plan}\n\n{queryset.query}')
+        if ordered and sorts(plan):
+            self.fail(f'Sort instead of an index scan:\n{plan}\n\n{queryset.query}')
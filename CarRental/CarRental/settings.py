@@ -30,12 +30,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'main',
     'accounts',
     'bookings',
     'vehicles',
     'payments',
+    'pricing',
 ]
 
 MIDDLEWARE = [
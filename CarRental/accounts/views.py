@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from .models import UserProfile
-from bookings.models import Booking
+from bookings.archive import user_history
 from .forms import UserUpdateForm, ProfileUpdateForm 
 from django.db import transaction 
 
@@ -19,7 +19,8 @@ def profile_view(request):
     user_form = UserUpdateForm(instance=request.user)
     profile_form = ProfileUpdateForm(instance=profile)
 
-    bookings = Booking.objects.filter(user=request.user).order_by('-created_at')
+    # الحجوزات الحية ثم المؤرشفة معاً (انظر bookings/archive.py)
+    bookings = user_history(request.user)
 
     context = {
         "bookings": bookings,
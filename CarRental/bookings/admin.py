@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking
+from .models import ArchivedBooking, Booking
 
 class BookingAdmin(admin.ModelAdmin):
     # الأعمدة المعروضة
@@ -14,4 +14,21 @@ class BookingAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     list_per_page = 20
 
-admin.site.register(Booking, BookingAdmin)
\ No newline at end of file
+admin.site.register(Booking, BookingAdmin)
+
+
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'car', 'start_date', 'end_date', 'status', 'total_price', 'created_at', 'archived_at')
+    list_filter = ('status', 'start_date', 'archived_at')
+    search_fields = ('user__username', 'user__email', 'car__brand', 'car__model_name', 'id')
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+    # الأرشيف للقراءة فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+admin.site.register(ArchivedBooking, ArchivedBookingAdmin)
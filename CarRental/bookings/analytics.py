@@ -0,0 +1,207 @@
+"""
+Fleet utilization over a date window, computed in NumPy.
+
+The bookings overlapping the window are read in one streamed query per
+table (live and archived, see archive.py) and painted into a cars x days occupancy matrix: each booking adds +1 at its
+first day and -1 after its last day of a difference array, and a cumulative
+sum along the days axis turns that into per-day occupancy. All metrics are
+then reductions over that matrix, grouped by rental company.
+
+A booking occupies every calendar day from its start date to its end date
+(inclusive, like ``Booking.duration_days``); its revenue is spread evenly
+over those days so that a window only gets the share it covers.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db.models.functions import TruncDate
+
+from vehicles.models import Car
+
+from .calendars import midnight
+from .models import ArchivedBooking, Booking
+
+# الحالات التي تعني أن السيارة كانت مشغولة فعلاً
+OCCUPIED_STATUSES = Booking.BLOCKING_STATUSES + ('COMPLETED',)
+
+STREAM_CHUNK_SIZE = 5000
+
+# مصفوفة الإشغال سيارات × أيام، فالنافذة محدودة (مثل fleet_grid.MAX_DAYS)
+MAX_WINDOW_DAYS = 366
+
+
+def paint_occupancy(car_index, first_day, last_day, n_cars, n_days):
+    """
+    Boolean ``(n_cars, n_days)`` matrix, True where a car is booked.
+    ``first_day``/``last_day`` are inclusive day offsets, already clipped
+    to ``[0, n_days)``.
+    """
+    diff = np.zeros((n_cars, n_days + 1), dtype=np.int32)
+    np.add.at(diff, (car_index, first_day), 1)
+    np.add.at(diff, (car_index, last_day + 1), -1)
+    return np.cumsum(diff[:, :n_days], axis=1) > 0
+
+
+def summarize(occupied, car_revenue, car_group, n_groups):
+    """Per-group totals from the occupancy matrix, as arrays indexed by group."""
+    n_days = occupied.shape[1]
+    cars = np.bincount(car_group, minlength=n_groups)
+    booked = np.bincount(car_group, weights=occupied.sum(axis=1), minlength=n_groups)
+    revenue = np.bincount(car_group, weights=car_revenue, minlength=n_groups)
+    available = cars * n_days
+    with np.errstate(divide='ignore', invalid='ignore'):
+        occupancy = np.where(available > 0, booked / available, 0.0)
+        revpar = np.where(available > 0, revenue / available, 0.0)
+    return {
+        'cars': cars,
+        'car_days': available,
+        'booked_days': booked.astype(np.int64),
+        'idle_days': (available - booked).astype(np.int64),
+        'occupancy': occupancy,
+        'revenue': revenue,
+        'revenue_per_car_day': revpar,
+    }
+
+
+def _stream_bookings(start, end, company_id=None):
+    """Column arrays of the bookings (live and archived) overlapping ``[start, end]`` (dates)."""
+    car_ids, starts, ends, prices = [], [], [], []
+    for model in (Booking, ArchivedBooking):
+        # حدود زمنية وليس __date حتى يبقى الشرط قابلاً لاستخدام الفهرس
+        qs = model.objects.filter(
+            status__in=OCCUPIED_STATUSES,
+            start_date__lt=midnight(end + timedelta(days=1)),
+            end_date__gte=midnight(start),
+        )
+        if company_id:
+            qs = qs.filter(car__rental_company_id=company_id)
+        rows = qs.annotate(
+            start_day=TruncDate('start_date'), end_day=TruncDate('end_date'),
+        ).values_list('car_id', 'start_day', 'end_day', 'total_price').order_by()
+
+        for car_id, start_day, end_day, price in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            car_ids.append(car_id)
+            starts.append(start_day)
+            ends.append(end_day)
+            prices.append(price)
+    return (
+        np.array(car_ids, dtype=np.int64),
+        np.array(starts, dtype='datetime64[D]'),
+        np.array(ends, dtype='datetime64[D]'),
+        np.array(prices, dtype=np.float64),
+    )
+
+
+def compute_utilization(fleet_car_ids, booking_car_ids, starts, ends, prices, start, n_days):
+    """
+    Occupancy matrix and per-car revenue share for the window.
+    ``fleet_car_ids`` must be sorted; bookings of other cars are ignored.
+    """
+    n_cars = len(fleet_car_ids)
+    car_index = np.searchsorted(fleet_car_ids, booking_car_ids)
+    known = car_index < n_cars
+    known[known] = fleet_car_ids[car_index[known]] == booking_car_ids[known]
+
+    origin = np.datetime64(start, 'D')
+    first = (starts - origin).astype(np.int64)
+    last = (ends - origin).astype(np.int64)
+    span = last - first + 1
+    first_in = np.clip(first, 0, n_days - 1)
+    last_in = np.clip(last, 0, n_days - 1)
+    known &= (span > 0) & (last >= 0) & (first < n_days)
+
+    car_index, first_in, last_in = car_index[known], first_in[known], last_in[known]
+    occupied = paint_occupancy(car_index, first_in, last_in, n_cars, n_days)
+
+    # نصيب النافذة من سعر الحجز = السعر × الأيام داخل النافذة ÷ كل أيام الحجز
+    share = prices[known] * (last_in - first_in + 1) / span[known]
+    car_revenue = np.bincount(car_index, weights=share, minlength=n_cars)
+    return occupied, car_revenue
+
+
+def check_window(start, end):
+    """Raise ValueError unless ``start``..``end`` is a window the report can compute."""
+    if end < start:
+        raise ValueError('تاريخ النهاية قبل تاريخ البداية.')
+    if (end - start).days + 1 > MAX_WINDOW_DAYS:
+        raise ValueError(f'الفترة أطول من {MAX_WINDOW_DAYS} يوماً.')
+    # نهاية النافذة تُحسب كبداية اليوم التالي
+    if end.year > 9998:
+        raise ValueError('تاريخ النهاية خارج النطاق.')
+
+
+def fleet_utilization(start, end, company_id=None):
+    """
+    Utilization report for the dates ``start``..``end`` (inclusive).
+
+    Returns ``{'start', 'end', 'days', 'companies': [...], 'total': {...}}``;
+    each company row and the total carry cars, car_days, booked_days,
+    idle_days, occupancy (0..1), revenue and revenue_per_car_day.
+    """
+    check_window(start, end)
+    n_days = (end - start).days + 1
+
+    fleet = Car.objects.order_by('pk')
+    if company_id:
+        fleet = fleet.filter(rental_company_id=company_id)
+    fleet = list(fleet.values_list('pk', 'rental_company_id', 'rental_company__name'))
+
+    companies = sorted({(company, name) for _, company, name in fleet}, key=lambda c: c[1])
+    group_of = {company: i for i, (company, _) in enumerate(companies)}
+    fleet_car_ids = np.array([row[0] for row in fleet], dtype=np.int64)
+    car_group = np.array([group_of[row[1]] for row in fleet], dtype=np.int64)
+
+    occupied, car_revenue = compute_utilization(
+        fleet_car_ids, *_stream_bookings(start, end, company_id), start=start, n_days=n_days,
+    )
+    per_company = summarize(occupied, car_revenue, car_group, len(companies))
+    total = summarize(occupied, car_revenue, np.zeros(len(fleet), dtype=np.int64), 1)
+
+    def row(metrics, i):
+        return {key: values[i].item() for key, values in metrics.items()}
+
+    return {
+        'start': start,
+        'end': end,
+        'days': n_days,
+        'companies': [
+            {'company_id': company, 'company': name, **row(per_company, i)}
+            for i, (company, name) in enumerate(companies)
+        ],
+        'total': row(total, 0),
+    }
+
+
+def benchmark(n_cars=10_000, n_days=365, bookings_per_car=12, seed=0):
+    """
+    Time the in-memory part (painting + metrics) on synthetic data.
+    Returns ``{'bookings', 'paint_seconds', 'summary_seconds', 'occupancy'}``.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_cars * bookings_per_car
+    fleet_car_ids = np.arange(1, n_cars + 1, dtype=np.int64)
+    booking_car_ids = rng.integers(1, n_cars + 1, n)
+    origin = np.datetime64('2025-01-01', 'D')
+    starts = origin + rng.integers(-10, n_days, n).astype('timedelta64[D]')
+    ends = starts + rng.integers(0, 14, n).astype('timedelta64[D]')
+    prices = rng.uniform(100, 1500, n) * ((ends - starts).astype(np.int64) + 1)
+    car_group = rng.integers(0, 50, n_cars)
+
+    began = time.perf_counter()
+    occupied, car_revenue = compute_utilization(
+        fleet_car_ids, booking_car_ids, starts, ends, prices, start=origin.item(), n_days=n_days,
+    )
+    painted = time.perf_counter()
+    total = summarize(occupied, car_revenue, car_group, 50)
+    done = time.perf_counter()
+    return {
+        'bookings': n,
+        'paint_seconds': painted - began,
+        'summary_seconds': done - painted,
+        'occupancy': float(total['booked_days'].sum() / total['car_days'].sum()),
+    }
+
+
+def default_window(today, days=30):
+    return today - timedelta(days=days - 1), today
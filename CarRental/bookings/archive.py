@@ -0,0 +1,86 @@
+"""
+Archive of closed bookings.
+
+COMPLETED/CANCELLED bookings that have been closed (last updated and ended)
+for more than ``BOOKING_ARCHIVE_AFTER_MONTHS`` months are moved, in batches,
+from Booking to ArchivedBooking with the same id and values, so that the
+overlap checks, the reviewer dashboard and the lifecycle jobs only scan
+live rows. Each batch is one transaction: copy, then delete.
+
+Archived bookings keep their share of the daily rollups (``rebuild_rollups``
+counts both tables). ``user_history`` reads both tables for the profile
+page; the staff dashboard and CSV export read ArchivedBooking directly.
+
+Bookings that have a RentalPayment stay in Booking: the payment's
+one-to-one key cascades, and payments are not archived.
+"""
+import calendar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking
+
+ARCHIVE_AFTER_MONTHS = getattr(settings, 'BOOKING_ARCHIVE_AFTER_MONTHS', 12)
+ARCHIVED_STATUSES = ('COMPLETED', 'CANCELLED')
+BATCH_SIZE = 500
+
+# كل حقول الحجز التي تُنسخ كما هي
+ARCHIVE_FIELDS = [field.attname for field in ArchivedBooking._meta.concrete_fields if field.name != 'archived_at']
+
+
+def months_ago(now, months):
+    year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+    month += 1
+    return now.replace(year=year, month=month, day=min(now.day, calendar.monthrange(year, month)[1]))
+
+
+def archivable(cutoff):
+    """Live bookings closed before ``cutoff``."""
+    return Booking.objects.filter(
+        status__in=ARCHIVED_STATUSES,
+        updated_at__lt=cutoff,
+        end_date__lt=cutoff,
+        payment__isnull=True,
+    )
+
+
+def archive_batch(cutoff, batch_size=BATCH_SIZE, after_id=0):
+    """Move up to ``batch_size`` bookings with ids above ``after_id``; returns their ids."""
+    with transaction.atomic():
+        rows = list(
+            archivable(cutoff).filter(pk__gt=after_id).order_by('pk')
+            .select_for_update(skip_locked=True, of=('self',))
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return []
+        ArchivedBooking.objects.bulk_create([ArchivedBooking(**row) for row in rows])
+
+        moved = Booking.objects.filter(pk__in=[row['id'] for row in rows])
+        # الملخصات اليومية تبقى كما هي (انظر signals.booking_deleted)
+        moved.archiving = True
+        moved.delete()
+    return [row['id'] for row in rows]
+
+
+def archive_closed(months=ARCHIVE_AFTER_MONTHS, batch_size=BATCH_SIZE, now=None):
+    """Archive every booking closed for more than ``months`` months; returns how many."""
+    cutoff = months_ago(now or timezone.now(), months)
+    archived, last_id = 0, 0
+    while True:
+        ids = archive_batch(cutoff, batch_size, after_id=last_id)
+        if not ids:
+            return archived
+        archived += len(ids)
+        last_id = ids[-1]
+
+
+def user_history(user):
+    """The user's live and archived bookings, newest first."""
+    live = list(Booking.objects.filter(user=user).select_related('car').order_by('-created_at'))
+    archived = list(ArchivedBooking.objects.filter(user=user).select_related('car').order_by('-created_at'))
+    if not archived:
+        return live
+    return sorted(live + archived, key=lambda booking: booking.created_at, reverse=True)
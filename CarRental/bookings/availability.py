@@ -0,0 +1,307 @@
+"""
+In-memory availability index per car.
+
+Each cached car holds its live bookings as two interval sets: the ones
+that block the car (CONFIRMED/ACTIVE) and the PENDING requests. Each set is
+a balanced search tree (a treap) ordered by start whose nodes also carry the
+largest end in their subtree, so adding or removing a booking and "is this
+range free" take O(log n), and conflict listing only descends into the
+subtrees that can hold a conflict.
+
+Entries are built lazily from the database, kept in sync by Booking
+signals once the change commits (see signals.py), evicted LRU-first beyond
+``AVAILABILITY_INDEX_MAX_CARS`` and rebuilt after
+``AVAILABILITY_INDEX_TTL`` seconds so that changes made by other processes
+are picked up. The index is a cache: anything that commits a booking must
+still check the database.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Booking
+
+MAX_CARS = getattr(settings, 'AVAILABILITY_INDEX_MAX_CARS', 1000)
+TTL = getattr(settings, 'AVAILABILITY_INDEX_TTL', 60)
+# الحجوزات المنتهية قبل هذه المدة لا تُحمّل في الذاكرة
+HISTORY = timedelta(days=getattr(settings, 'AVAILABILITY_INDEX_HISTORY_DAYS', 30))
+
+INDEXED_STATUSES = ('PENDING',) + Booking.BLOCKING_STATUSES
+
+
+class _Node:
+    __slots__ = ('item', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, item):
+        self.item = item
+        self.priority = random.random()
+        self.left = self.right = None
+        self.max_end = item[1]
+
+
+def _update(node):
+    max_end = node.item[1]
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+    return node
+
+
+def _split(node, item):
+    """``(nodes < item, nodes >= item)``."""
+    if node is None:
+        return None, None
+    if node.item < item:
+        node.right, right = _split(node.right, item)
+        return _update(node), right
+    left, node.left = _split(node.left, item)
+    return left, _update(node)
+
+
+def _merge(left, right):
+    # كل عناصر left أصغر من عناصر right
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node, item):
+    if node.item == item:
+        return _merge(node.left, node.right)
+    if item < node.item:
+        node.left = _remove(node.left, item)
+    else:
+        node.right = _remove(node.right, item)
+    return _update(node)
+
+
+def _collect(node, start, end, found):
+    # شجرة فرعية لا تتجاوز أقصى نهاية فيها البداية لا تحوي تعارضاً
+    if node is None or node.max_end <= start:
+        return
+    _collect(node.left, start, end, found)
+    if node.item[0] >= end:
+        return
+    if node.item[1] > start:
+        found.append(node.item[2])
+    _collect(node.right, start, end, found)
+
+
+class IntervalSet:
+    """
+    Half-open [start, end) intervals tagged with a booking id, in a treap
+    ordered by ``(start, end, id)`` where each node also holds the largest
+    end in its subtree. ``add``/``discard`` and ``is_free`` take O(log n)
+    expected time, ``conflicts`` O((k + 1) log n) for k conflicts.
+    """
+
+    def __init__(self, items=()):
+        self._root = None
+        self._by_id = {}
+        for start, end, booking_id in items:
+            self.add(start, end, booking_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        """``(start, end, booking_id)`` in start order."""
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.item
+            node = node.right
+
+    def add(self, start, end, booking_id):
+        self.discard(booking_id)
+        item = (start, end, booking_id)
+        left, right = _split(self._root, item)
+        self._root = _merge(_merge(left, _Node(item)), right)
+        self._by_id[booking_id] = item
+
+    def discard(self, booking_id):
+        item = self._by_id.pop(booking_id, None)
+        if item is not None:
+            self._root = _remove(self._root, item)
+
+    def _max_end_before(self, point):
+        """Largest end among the intervals starting before ``point`` (None if there are none)."""
+        best, node = None, self._root
+        while node is not None:
+            if node.item[0] < point:
+                # العقدة وكل شجرتها اليسرى تبدأ قبل point
+                end = node.item[1]
+                if node.left is not None and node.left.max_end > end:
+                    end = node.left.max_end
+                if best is None or end > best:
+                    best = end
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def is_free(self, start, end):
+        max_end = self._max_end_before(end)
+        return max_end is None or max_end <= start
+
+    def conflicts(self, start, end):
+        found = []
+        _collect(self._root, start, end, found)
+        return found
+
+    def next_free_slot(self, after, duration):
+        candidate = after
+        while True:
+            max_end = self._max_end_before(candidate + duration)
+            if max_end is None or max_end <= candidate:
+                return candidate
+            # كل بداية قبل أقصى نهاية متداخلة ستتعارض، فنقفز إليها مباشرة
+            candidate = max_end
+
+
+class CarAvailability:
+    def __init__(self, car_id, rows, loaded_from):
+        self.car_id = car_id
+        self.loaded_from = loaded_from
+        self.built_at = time.monotonic()
+        self.blocking = IntervalSet()
+        self.pending = IntervalSet()
+        self._status = {}
+        for booking_id, start, end, status in rows:
+            self._put(booking_id, start, end, status)
+
+    def _put(self, booking_id, start, end, status):
+        target = self.blocking if status in Booking.BLOCKING_STATUSES else self.pending
+        target.add(start, end, booking_id)
+        self._status[booking_id] = status
+
+    def update(self, booking_id, start, end, status):
+        self.discard(booking_id)
+        if status in INDEXED_STATUSES and end >= self.loaded_from:
+            self._put(booking_id, start, end, status)
+
+    def discard(self, booking_id):
+        status = self._status.pop(booking_id, None)
+        if status is not None:
+            (self.blocking if status in Booking.BLOCKING_STATUSES else self.pending).discard(booking_id)
+
+
+class AvailabilityIndex:
+    def __init__(self, max_cars=MAX_CARS, ttl=TTL):
+        self.max_cars = max_cars
+        self.ttl = ttl
+        self._cars = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, car_id):
+        loaded_from = timezone.now() - HISTORY
+        rows = Booking.objects.filter(
+            car_id=car_id, status__in=INDEXED_STATUSES, end_date__gte=loaded_from,
+        ).values_list('id', 'start_date', 'end_date', 'status')
+        return CarAvailability(car_id, list(rows), loaded_from)
+
+    def _get(self, car_id):
+        with self._lock:
+            entry = self._cars.get(car_id)
+            if entry is not None and time.monotonic() - entry.built_at < self.ttl:
+                self._cars.move_to_end(car_id)
+                return entry
+
+        entry = self._load(car_id)
+        with self._lock:
+            self._cars[car_id] = entry
+            self._cars.move_to_end(car_id)
+            while len(self._cars) > self.max_cars:
+                self._cars.popitem(last=False)
+        return entry
+
+    def _covers(self, entry, start):
+        return start >= entry.loaded_from
+
+    # --- الاستعلامات ---
+
+    def is_free(self, car_id, start, end):
+        entry = self._get(car_id)
+        if not self._covers(entry, start):
+            return not _db_blocking(car_id, start, end).exists()
+        return entry.blocking.is_free(start, end)
+
+    def conflicts(self, car_id, start, end, include_pending=False):
+        entry = self._get(car_id)
+        if not self._covers(entry, start):
+            statuses = INDEXED_STATUSES if include_pending else Booking.BLOCKING_STATUSES
+            return list(_db_overlapping(car_id, start, end, statuses).values_list('id', flat=True))
+        found = entry.blocking.conflicts(start, end)
+        if include_pending:
+            found += entry.pending.conflicts(start, end)
+        return found
+
+    def next_free_slot(self, car_id, after, duration):
+        entry = self._get(car_id)
+        return entry.blocking.next_free_slot(max(after, entry.loaded_from), duration)
+
+    # --- المزامنة (تُستدعى من signals.py) ---
+
+    def booking_saved(self, booking_id, car_id, start, end, status, old_car_id=None):
+        with self._lock:
+            if old_car_id is not None and old_car_id != car_id and old_car_id in self._cars:
+                self._cars[old_car_id].discard(booking_id)
+            entry = self._cars.get(car_id)
+            if entry is not None:
+                entry.update(booking_id, start, end, status)
+
+    def booking_deleted(self, booking_id, car_id):
+        with self._lock:
+            entry = self._cars.get(car_id)
+            if entry is not None:
+                entry.discard(booking_id)
+
+    def invalidate(self, car_id=None):
+        """Drop one car (or everything) after a queryset.update()."""
+        with self._lock:
+            if car_id is None:
+                self._cars.clear()
+            else:
+                self._cars.pop(car_id, None)
+
+
+def _db_overlapping(car_id, start, end, statuses):
+    return Booking.objects.filter(
+        car_id=car_id, status__in=statuses, start_date__lt=end, end_date__gt=start,
+    )
+
+
+def _db_blocking(car_id, start, end):
+    return _db_overlapping(car_id, start, end, Booking.BLOCKING_STATUSES)
+
+
+availability = AvailabilityIndex()
+
+
+def is_range_free(car_id, start, end):
+    """
+    Index answer, re-checked against the database when it reports a
+    conflict (the index may be stale if another process cancelled it).
+    """
+    if availability.is_free(car_id, start, end):
+        return True
+    if _db_blocking(car_id, start, end).exists():
+        return False
+    availability.invalidate(car_id)
+    return True
@@ -0,0 +1,127 @@
+"""
+Per-car month calendars of booked days.
+
+A month is stored in the cache as one integer bitmap: bit ``d - 1`` is set
+when day ``d`` overlaps a CONFIRMED/ACTIVE booking. Days follow the same
+half-open rule as the booking overlap check (a booking ending at midnight
+leaves that day free), so the calendar agrees with what the booking form
+will accept. Entries are dropped only for the car and months that a
+booking change actually touches (see ``booking_changed``).
+
+That drop reaches only the cache of the process that made the change
+(the default cache is per process), so entries expire after
+``BOOKING_CALENDAR_CACHE_TIMEOUT`` seconds (one minute by default) and other
+workers are at most that far behind. With a shared cache backend configured
+in ``CACHES`` the timeout can be raised.
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking
+
+CALENDAR_CACHE_TIMEOUT = getattr(settings, 'BOOKING_CALENDAR_CACHE_TIMEOUT', 60)
+
+
+def _key(car_id, year, month):
+    return f'booking_calendar:{car_id}:{year:04d}{month:02d}'
+
+
+def midnight(day):
+    """Aware start of a local date."""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _first_free_day(end):
+    # نهاية عند منتصف الليل لا تحجز ذلك اليوم (فترة نصف مفتوحة)
+    local = timezone.localtime(end)
+    day = local.date()
+    return day if local.time() == datetime.min.time() else day + timedelta(days=1)
+
+
+def booked_days(start, end):
+    """Local ``(first, stop)`` dates a booking blocks; ``stop`` is exclusive."""
+    return timezone.localdate(start), _first_free_day(end)
+
+
+def _build(car_id, year, month):
+    days = calendar.monthrange(year, month)[1]
+    first = date(year, month, 1)
+    rows = Booking.objects.filter(
+        car_id=car_id,
+        status__in=Booking.BLOCKING_STATUSES,
+        start_date__lt=midnight(first + timedelta(days=days)),
+        end_date__gt=midnight(first),
+    ).values_list('start_date', 'end_date')
+
+    bitmap = 0
+    for start, end in rows:
+        first_day, stop = booked_days(start, end)
+        lo = max((first_day - first).days, 0)
+        hi = min((stop - first).days, days)
+        if hi > lo:
+            bitmap |= ((1 << (hi - lo)) - 1) << lo
+    return bitmap
+
+
+def month_bitmap(car_id, year, month):
+    key = _key(car_id, year, month)
+    bitmap = cache.get(key)
+    if bitmap is None:
+        bitmap = _build(car_id, year, month)
+        cache.set(key, bitmap, CALENDAR_CACHE_TIMEOUT)
+    return bitmap
+
+
+def month_calendar(car_id, year, month):
+    """``{'month', 'days', 'bitmap', 'booked', 'free'}`` for one car."""
+    days = calendar.monthrange(year, month)[1]
+    bitmap = month_bitmap(car_id, year, month)
+    booked = [d for d in range(1, days + 1) if bitmap >> (d - 1) & 1]
+    return {
+        'month': f'{year:04d}-{month:02d}',
+        'days': days,
+        'bitmap': bitmap,
+        'booked': booked,
+        'free': [d for d in range(1, days + 1) if not bitmap >> (d - 1) & 1],
+    }
+
+
+def _months(start, end):
+    day = timezone.localdate(start).replace(day=1)
+    last = _first_free_day(end)
+    while day < last:
+        yield day.year, day.month
+        day = (day + timedelta(days=32)).replace(day=1)
+
+
+def invalidate(car_id, start, end):
+    """Drop the cached months of ``car_id`` that ``[start, end)`` overlaps."""
+    if car_id is None or start is None or end is None or end <= start:
+        return
+    keys = [_key(car_id, year, month) for year, month in _months(start, end)]
+    # بعد الـ commit، وإلا قد يعيد قارئ آخر بناء الشهر من البيانات القديمة
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def booking_changed(old, new):
+    """
+    Invalidate after a booking moved from ``old`` to ``new``; both are
+    ``(car_id, start, end, status)`` or None. Nothing is dropped when
+    neither side blocks the car or nothing relevant changed.
+    """
+    def blocked_range(state):
+        if state is not None and state[3] in Booking.BLOCKING_STATUSES:
+            return state[:3]
+        return None
+
+    old, new = blocked_range(old), blocked_range(new)
+    if old == new:
+        return
+    for state in (old, new):
+        if state is not None:
+            invalidate(*state)
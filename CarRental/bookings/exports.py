@@ -0,0 +1,207 @@
+"""
+Incremental columnar exports for offline analysis.
+
+Each table is exported to ``<output>/<table>/month=YYYY-MM/part-<run>.<ext>``
+(Parquet, or Arrow IPC files), partitioned by the month of ``created_at``.
+A run reads only the rows past the table's high-water mark -- the last
+``(updated_at, id)`` exported -- streaming them with a server-side cursor in
+chunks of ``chunk_size`` rows, and writes each chunk as one record batch.
+
+The marks live in ``<output>/_state.json`` and are only advanced after all
+of a table's files are in place; files are written under a temporary name
+and renamed at the end, so an interrupted run leaves no partial parts and
+the next run starts again from the old mark. A row updated after it was
+exported appears again in a later part: readers keep the row with the latest
+``updated_at`` per id.
+
+Rows newer than ``settle`` are left for the next run, so that transactions
+still in flight when the run starts (whose timestamps may be older than rows
+already committed) are not skipped over by the mark.
+"""
+import json
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from django.apps import apps
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+ExportSpec = namedtuple('ExportSpec', 'model watermark exclude')
+
+EXPORTS = {
+    'bookings': ExportSpec('bookings.Booking', 'updated_at', ()),
+    'payments': ExportSpec('payments.RentalPayment', 'updated_at', ()),
+    'reviews': ExportSpec('vehicles.CarReview', 'updated_at', ()),
+    # حقول البحث مشتقة من باقي الحقول
+    'cars': ExportSpec('vehicles.Car', 'updated_at', ('search_document', 'brand_key', 'model_key')),
+}
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+STATE_FILE = '_state.json'
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_SETTLE = timedelta(minutes=1)
+
+
+def arrow_type(field):
+    if isinstance(field, models.ForeignKey):
+        return pa.int64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def table_schema(spec):
+    """``(columns, schema)`` of the exported fields of ``spec.model``."""
+    model = apps.get_model(spec.model)
+    fields = [field for field in model._meta.concrete_fields if field.name not in spec.exclude]
+    columns = [field.attname for field in fields]
+    schema = pa.schema([pa.field(field.attname, arrow_type(field), nullable=field.null) for field in fields])
+    return columns, schema
+
+
+def load_state(output):
+    try:
+        with open(os.path.join(output, STATE_FILE)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(output, state):
+    path = os.path.join(output, STATE_FILE)
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def pending_rows(spec, columns, mark, until, chunk_size):
+    """Rows after the ``mark`` and up to ``until``, in ``(watermark, id)`` order."""
+    model = apps.get_model(spec.model)
+    qs = model.objects.filter(**{f'{spec.watermark}__lte': until})
+    if mark:
+        ts = datetime.fromisoformat(mark['ts'])
+        qs = qs.filter(
+            Q(**{f'{spec.watermark}__gt': ts}) | Q(**{spec.watermark: ts, 'pk__gt': mark['id']})
+        )
+    rows = qs.order_by(spec.watermark, 'pk').values_list(*columns)
+    return rows.iterator(chunk_size=chunk_size)
+
+
+class _PartitionWriters:
+    """One open writer per month partition, renamed into place on ``commit``."""
+
+    def __init__(self, directory, schema, fmt, run):
+        self.directory = directory
+        self.schema = schema
+        self.fmt = fmt
+        self.run = run
+        self.writers = {}
+
+    def _open(self, month):
+        folder = os.path.join(self.directory, f'month={month}')
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'part-{self.run}.{FORMATS[self.fmt]}')
+        if self.fmt == 'parquet':
+            writer = pq.ParquetWriter(path + '.tmp', self.schema, compression='zstd')
+        else:
+            writer = ipc.new_file(path + '.tmp', self.schema)
+        self.writers[month] = (writer, path)
+        return writer
+
+    def write(self, month, rows):
+        writer = self.writers[month][0] if month in self.writers else self._open(month)
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*rows), self.schema)],
+            schema=self.schema,
+        )
+        if self.fmt == 'parquet':
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+
+    def close(self):
+        for writer, _ in self.writers.values():
+            writer.close()
+
+    def commit(self):
+        self.close()
+        for _, path in self.writers.values():
+            os.replace(path + '.tmp', path)
+        return sorted(path for _, path in self.writers.values())
+
+    def discard(self):
+        self.close()
+        for _, path in self.writers.values():
+            os.remove(path + '.tmp')
+
+
+def export_table(name, output, state, fmt='parquet', chunk_size=DEFAULT_CHUNK_SIZE,
+                 settle=DEFAULT_SETTLE, now=None):
+    """
+    Export the new rows of table ``name``; updates ``state[name]`` in place.
+    Returns ``(rows, files)``.
+    """
+    spec = EXPORTS[name]
+    columns, schema = table_schema(spec)
+    created = columns.index('created_at')
+    watermark = columns.index(spec.watermark)
+    pk = columns.index(apps.get_model(spec.model)._meta.pk.attname)
+    now = now or timezone.now()
+    run = now.strftime('%Y%m%dT%H%M%S%fZ')
+
+    writers = _PartitionWriters(os.path.join(output, name), schema, fmt, run)
+    exported, last = 0, None
+    chunk = []
+
+    def flush():
+        months = {}
+        for row in chunk:
+            months.setdefault(row[created].astimezone(dt_timezone.utc).strftime('%Y-%m'), []).append(row)
+        for month, rows in months.items():
+            writers.write(month, rows)
+        chunk.clear()
+
+    try:
+        for row in pending_rows(spec, columns, state.get(name), now - settle, chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                last = chunk[-1]
+                flush()
+            exported += 1
+        if chunk:
+            last = chunk[-1]
+            flush()
+    except BaseException:
+        writers.discard()
+        raise
+
+    files = writers.commit()
+    if last is not None:
+        state[name] = {'ts': last[watermark].isoformat(), 'id': last[pk]}
+    return exported, files
+
+
+def export_all(output, tables=None, **options):
+    """Export every table in ``tables`` (default: all), saving the marks after each."""
+    os.makedirs(output, exist_ok=True)
+    state = load_state(output)
+    results = {}
+    for name in tables or EXPORTS:
+        results[name] = export_table(name, output, state, **options)
+        save_state(output, state)
+    return results
@@ -0,0 +1,136 @@
+"""
+Fleet availability grid: one packed bit row per car, one bit per day.
+
+The grid is built from a single range-bounded scan of CONFIRMED/ACTIVE
+bookings (same half-open day rule as calendars.py). Rows are stored with
+``numpy.packbits`` (90 days fit in 12 bytes per car), and the planner
+queries run on the whole grid at once:
+
+* ``free_for(days)`` -- AND every row with a packed day mask.
+* ``first_free_window(n)`` -- shift-AND the free days ``n - 1`` times so a
+  set bit marks the start of ``n`` free days, then take the first one.
+
+``to_json`` sends each row base64-encoded; ``to_bytes`` is the binary form:
+a ``FLEETGRID_HEADER`` followed by the car ids (int64 little-endian) and
+the packed rows.
+"""
+import base64
+import struct
+from datetime import timedelta
+
+import numpy as np
+
+from vehicles.models import Car
+
+from .analytics import paint_occupancy
+from .calendars import booked_days, midnight
+from .models import Booking
+
+DEFAULT_DAYS = 90
+MAX_DAYS = 366
+
+# magic, version, start (ordinal), days, cars
+FLEETGRID_HEADER = struct.Struct('<4sBIHI')
+FLEETGRID_MAGIC = b'FGRD'
+
+
+class FleetGrid:
+    def __init__(self, start, days, car_ids, company_ids, booked):
+        self.start = start
+        self.days = days
+        self.car_ids = car_ids
+        self.company_ids = company_ids
+        self.bits = np.packbits(booked, axis=1)
+
+    @property
+    def booked(self):
+        return np.unpackbits(self.bits, axis=1, count=self.days).astype(bool)
+
+    def day(self, offset):
+        return self.start + timedelta(days=int(offset))
+
+    def free_for(self, days):
+        """Ids of the cars free on every date in ``days`` (dates outside the grid are ignored)."""
+        mask = np.zeros(self.days, dtype=bool)
+        for day in days:
+            offset = (day - self.start).days
+            if 0 <= offset < self.days:
+                mask[offset] = True
+        packed = np.packbits(mask)
+        return self.car_ids[~(self.bits & packed).any(axis=1)].tolist()
+
+    def first_free_window(self, length):
+        """``{car_id: first date of length free days}`` for cars that have one."""
+        if not 1 <= length <= self.days:
+            return {}
+        run = ~self.booked
+        free = run.copy()
+        for shift in range(1, length):
+            run[:, :-shift] &= free[:, shift:]
+            run[:, -shift:] = False
+        found = run.any(axis=1)
+        first = run.argmax(axis=1)
+        return {
+            int(car_id): self.day(offset)
+            for car_id, offset in zip(self.car_ids[found], first[found])
+        }
+
+    def to_json(self):
+        return {
+            'start': self.start.isoformat(),
+            'days': self.days,
+            'encoding': 'base64 packbits, most significant bit first',
+            'cars': [
+                {'id': int(car_id), 'company': int(company_id), 'bits': base64.b64encode(row.tobytes()).decode()}
+                for car_id, company_id, row in zip(self.car_ids, self.company_ids, self.bits)
+            ],
+        }
+
+    def to_bytes(self):
+        header = FLEETGRID_HEADER.pack(
+            FLEETGRID_MAGIC, 1, self.start.toordinal(), self.days, len(self.car_ids),
+        )
+        return header + self.car_ids.astype('<i8').tobytes() + self.bits.tobytes()
+
+
+def build_grid(start, days=DEFAULT_DAYS, company_id=None):
+    """FleetGrid of every car (optionally one company's) for ``days`` days from ``start``."""
+    cars = Car.objects.order_by('pk')
+    if company_id:
+        cars = cars.filter(rental_company_id=company_id)
+    fleet = list(cars.values_list('pk', 'rental_company_id'))
+    car_ids = np.array([pk for pk, _ in fleet], dtype=np.int64)
+    company_ids = np.array([company for _, company in fleet], dtype=np.int64)
+
+    bookings = Booking.objects.filter(
+        status__in=Booking.BLOCKING_STATUSES,
+        start_date__lt=midnight(start + timedelta(days=days)),
+        end_date__gt=midnight(start),
+    )
+    if company_id:
+        bookings = bookings.filter(car__rental_company_id=company_id)
+
+    rows, firsts, lasts = [], [], []
+    scan = bookings.values_list('car_id', 'start_date', 'end_date').order_by()
+    for car_id, booking_start, booking_end in scan.iterator(chunk_size=5000):
+        first_day, stop = booked_days(booking_start, booking_end)
+        first = max((first_day - start).days, 0)
+        last = min((stop - start).days, days) - 1
+        if last >= first:
+            rows.append(car_id)
+            firsts.append(first)
+            lasts.append(last)
+
+    rows = np.array(rows, dtype=np.int64)
+    car_index = np.searchsorted(car_ids, rows)
+    # حجز لسيارة أضيفت بعد قراءة قائمة الأسطول
+    known = car_index < len(car_ids)
+    known[known] = car_ids[car_index[known]] == rows[known]
+    booked = paint_occupancy(
+        car_index[known],
+        np.array(firsts, dtype=np.int64)[known],
+        np.array(lasts, dtype=np.int64)[known],
+        len(car_ids),
+        days,
+    )
+    return FleetGrid(start, days, car_ids, company_ids, booked)
@@ -1,6 +1,6 @@
 from django import forms
 from .models import Booking
-from django.db.models import Q
+from .availability import availability, is_range_free
 
 class BookingForm(forms.ModelForm):
     class Meta:
@@ -51,16 +51,12 @@ class BookingForm(forms.ModelForm):
             raise forms.ValidationError("تاريخ النهاية يجب أن يكون بعد تاريخ البداية.")
 
         if self.car_id and start and end:
-            
-            overlap = Booking.objects.filter(
-                car_id=self.car_id,
-                status='CONFIRMED'
-            ).filter(
-                start_date__lt=end,
-                end_date__gt=start
-            ).exists()
 
-            if overlap:
-                raise forms.ValidationError("عذراً، السيارة محجوزة بالفعل في هذه الفترة.")
+            # فهرس التوفر في الذاكرة بدل استعلام تداخل لكل تحقق
+            if not is_range_free(self.car_id, start, end):
+                next_slot = availability.next_free_slot(self.car_id, start, end - start)
+                raise forms.ValidationError(
+                    f"عذراً، السيارة محجوزة بالفعل في هذه الفترة. أقرب موعد متاح يبدأ من {next_slot:%Y-%m-%d}."
+                )
         
         return cleaned_data
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Time-driven booking status changes.
+
+* CONFIRMED -> ACTIVE once the rental has started.
+* CONFIRMED/ACTIVE -> COMPLETED once it has ended.
+* PENDING -> CANCELLED when the request is older than the pending TTL
+  (``BOOKING_PENDING_TTL_HOURS``) or its start date has already passed.
+
+Each step claims at most ``batch_size`` rows with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and moves them with one UPDATE
+through ``services.transition_bookings``, so several runners can work the
+same backlog without blocking on, or double-processing, each other's rows.
+SQLite has no SKIP LOCKED: run a single runner there.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking
+from .services import transition_bookings
+
+PENDING_TTL = timedelta(hours=getattr(settings, 'BOOKING_PENDING_TTL_HOURS', 48))
+BATCH_SIZE = 500
+
+
+def transitions(now, pending_ttl=PENDING_TTL):
+    """``(name, target status, condition)`` in the order they are applied."""
+    return [
+        ('activated', 'ACTIVE', Q(status='CONFIRMED', start_date__lte=now, end_date__gt=now)),
+        ('completed', 'COMPLETED', Q(status__in=Booking.BLOCKING_STATUSES, end_date__lte=now)),
+        ('expired', 'CANCELLED', Q(status='PENDING') & (Q(created_at__lt=now - pending_ttl) | Q(start_date__lte=now))),
+    ]
+
+
+def due_bookings(condition):
+    # بلا ORDER BY حتى يقرأ المخطط فهرس الحالة؛ الترتيب بـ id كان يمر على الجدول كله بترتيب المفتاح
+    return Booking.objects.filter(condition).order_by()
+
+
+def run_batch(condition, status, batch_size=BATCH_SIZE):
+    """Move up to ``batch_size`` due bookings to ``status``; returns how many moved."""
+    with transaction.atomic():
+        due = due_bookings(condition)
+        if connection.features.has_select_for_update_skip_locked:
+            # الصفوف التي يعالجها عامل آخر تُتخطى بدل انتظارها
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        return len(transition_bookings(Booking.objects.filter(condition, pk__in=ids), status))
+
+
+def run_lifecycle(now=None, batch_size=BATCH_SIZE, pending_ttl=PENDING_TTL):
+    """Apply every transition until nothing is due; returns ``{name: count}``."""
+    now = now or timezone.now()
+    counts = {}
+    for name, status, condition in transitions(now, pending_ttl):
+        counts[name] = 0
+        while True:
+            moved = run_batch(condition, status, batch_size)
+            counts[name] += moved
+            if moved < batch_size:
+                break
+    return counts
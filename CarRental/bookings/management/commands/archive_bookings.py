@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.archive import ARCHIVE_AFTER_MONTHS, BATCH_SIZE, archivable, archive_closed, months_ago
+
+
+class Command(BaseCommand):
+    help = 'نقل الحجوزات المكتملة والملغاة المغلقة منذ أكثر من عدد من الأشهر إلى الأرشيف، على دفعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=ARCHIVE_AFTER_MONTHS, help='عمر الحجز المغلق بالأشهر قبل أرشفته')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='عدد الحجوزات في كل دفعة')
+        parser.add_argument('--dry-run', action='store_true', help='عدّ الحجوزات القابلة للأرشفة دون نقلها')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--months و --batch-size يجب أن يكونا أكبر من صفر.')
+
+        if options['dry_run']:
+            count = archivable(months_ago(timezone.now(), options['months'])).count()
+            self.stdout.write(f'{count} حجز قابل للأرشفة.')
+            return
+
+        archived = archive_closed(months=options['months'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'تم نقل {archived} حجز إلى الأرشيف.'))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.exports import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, export_all
+
+
+class Command(BaseCommand):
+    help = 'تصدير تزايدي للحجوزات والمدفوعات والتقييمات والسيارات إلى ملفات Parquet/Arrow مقسمة حسب الشهر'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='مجلد التصدير (يُحفظ فيه موضع آخر تصدير)')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='parquet', help='صيغة الملفات')
+        parser.add_argument('--table', action='append', choices=sorted(EXPORTS), dest='tables',
+                            help='جدول واحد (يمكن تكراره)، الافتراضي كل الجداول')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='عدد الصفوف في كل دفعة قراءة')
+        parser.add_argument('--settle-seconds', type=int, default=60,
+                            help='تجاهل الصفوف الأحدث من هذه المدة حتى التشغيل التالي')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size يجب أن يكون أكبر من صفر.')
+        try:
+            results = export_all(
+                options['output'],
+                tables=options['tables'],
+                fmt=options['format'],
+                chunk_size=options['chunk_size'],
+                settle=timedelta(seconds=max(options['settle_seconds'], 0)),
+            )
+        except OSError as exc:
+            raise CommandError(f'تعذر الكتابة في مجلد التصدير: {exc}')
+        for name, (rows, files) in results.items():
+            self.stdout.write(self.style.SUCCESS(f'{name}: تم تصدير {rows} صف في {len(files)} ملف.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.rollups import find_drift, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء ملخصات الحجوزات اليومية من جدول الحجوزات، أو فحص انحرافها (--check)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='عدد السيارات في كل دفعة')
+        parser.add_argument('--check', action='store_true', help='مقارنة الملخصات بالحجوزات دون تعديل')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            written = rebuild_rollups(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'تم بناء {written} صف ملخص.'))
+            return
+
+        drifted = 0
+        for (day, car_id, status), stored, expected in find_drift(batch_size=options['batch_size']):
+            drifted += 1
+            self.stdout.write(f'{day} car={car_id} {status}: stored={stored} expected={expected}')
+        if drifted:
+            raise CommandError(f'{drifted} صف ملخص لا يطابق الحجوزات. شغّل الأمر دون --check لإصلاحها.')
+        self.stdout.write(self.style.SUCCESS('الملخصات مطابقة للحجوزات.'))
@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from bookings.lifecycle import BATCH_SIZE, PENDING_TTL, run_lifecycle
+
+
+class Command(BaseCommand):
+    help = 'نقل الحجوزات المؤكدة إلى نشطة ثم مكتملة حسب التواريخ، وإلغاء الطلبات المعلقة المنتهية الصلاحية'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--pending-ttl-hours', type=float, default=PENDING_TTL.total_seconds() / 3600,
+            help='عمر الطلب المعلق قبل إلغائه (بالساعات)',
+        )
+        parser.add_argument('--loop', action='store_true', help='التشغيل المستمر بدل مرة واحدة (للـ cron اتركه)')
+        parser.add_argument('--interval', type=int, default=60, help='الثواني بين الدورات مع --loop')
+
+    def handle(self, *args, **options):
+        ttl = timedelta(hours=options['pending_ttl_hours'])
+        while True:
+            counts = run_lifecycle(batch_size=options['batch_size'], pending_ttl=ttl)
+            summary = ', '.join(f'{name}={count}' for name, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(summary) if any(counts.values()) else summary)
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_merge_20251208_1049'),
+        ('vehicles', '0007_car_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['car', 'status', 'start_date', 'end_date'], name='booking_car_status_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+CONSTRAINT = 'booking_no_overlap'
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # قيد احتياطي على مستوى قاعدة البيانات (PostgreSQL فقط): لا حجزين مؤكدين متداخلين لنفس السيارة
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT a.id, b.id FROM bookings_booking a
+            JOIN bookings_booking b ON a.car_id = b.car_id AND a.id < b.id
+            WHERE a.status IN ('CONFIRMED', 'ACTIVE') AND b.status IN ('CONFIRMED', 'ACTIVE')
+              AND a.start_date < b.end_date AND b.start_date < a.end_date
+            LIMIT 20
+            """
+        )
+        overlaps = cursor.fetchall()
+    if overlaps:
+        raise RuntimeError(
+            f'Resolve overlapping confirmed bookings before adding {CONSTRAINT}: {overlaps}'
+        )
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f"""
+        ALTER TABLE bookings_booking ADD CONSTRAINT {CONSTRAINT}
+        EXCLUDE USING gist (car_id WITH =, tstzrange(start_date, end_date, '[)') WITH &&)
+        WHERE (status IN ('CONFIRMED', 'ACTIVE'))
+        """
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'ALTER TABLE bookings_booking DROP CONSTRAINT IF EXISTS {CONSTRAINT}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_overlap_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:50
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery
+
+
+def snapshot_daily_rates(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    Car = apps.get_model('vehicles', 'Car')
+
+    # الحجوزات القديمة: نستنتج السعر من الإجمالي المخزن حتى لا يتغير
+    Booking.objects.filter(daily_rate__isnull=True, duration_days__gt=0).update(
+        daily_rate=ExpressionWrapper(
+            F('total_price') / F('duration_days'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+    )
+    Booking.objects.filter(daily_rate__isnull=True).update(
+        daily_rate=Subquery(Car.objects.filter(pk=OuterRef('car_id')).values('daily_price')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_no_overlap_constraint'),
+        ('vehicles', '0007_car_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='daily_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='سعر اليوم عند الحجز'),
+        ),
+        migrations.RunPython(snapshot_daily_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingDailyRollup = apps.get_model('bookings', 'BookingDailyRollup')
+
+    rows = (
+        Booking.objects.annotate(day=TruncDate('start_date'))
+        .values('day', 'car_id', 'car__rental_company_id', 'status')
+        .annotate(n=Count('id'), days=Sum('duration_days'), revenue=Sum('total_price'))
+        .order_by()
+    )
+    BookingDailyRollup.objects.bulk_create([
+        BookingDailyRollup(
+            day=row['day'], car_id=row['car_id'], rental_company_id=row['car__rental_company_id'],
+            status=row['status'], bookings=row['n'], booked_days=row['days'] or 0, revenue=row['revenue'] or 0,
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_daily_rate'),
+        ('vehicles', '0007_car_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='اليوم')),
+                ('status', models.CharField(choices=[('PENDING', 'قيد المراجعة'), ('CONFIRMED', 'مؤكد'), ('ACTIVE', 'قيد الاستخدام'), ('COMPLETED', 'مكتمل'), ('CANCELLED', 'ملغي')], max_length=20, verbose_name='حالة الحجز')),
+                ('bookings', models.IntegerField(default=0, verbose_name='عدد الحجوزات')),
+                ('booked_days', models.IntegerField(default=0, verbose_name='أيام الحجز')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='الإيرادات')),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='vehicles.car', verbose_name='السيارة')),
+                ('rental_company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='vehicles.rentalcompany', verbose_name='شركة التأجير')),
+            ],
+            options={
+                'verbose_name': 'ملخص حجوزات يومي',
+                'verbose_name_plural': 'ملخصات الحجوزات اليومية',
+                'indexes': [models.Index(fields=['rental_company', 'day'], name='booking_rollup_company_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'car', 'status'), name='booking_rollup_day_car_status_uniq'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
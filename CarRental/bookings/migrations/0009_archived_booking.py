@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_daily_rollup'),
+        ('vehicles', '0007_car_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_date', models.DateTimeField(verbose_name='تاريخ الاستلام')),
+                ('end_date', models.DateTimeField(verbose_name='تاريخ التسليم')),
+                ('pickup_location', models.CharField(max_length=255, verbose_name='موقع الاستلام (العنوان)')),
+                ('dropoff_location', models.CharField(max_length=255, verbose_name='موقع التسليم (العنوان)')),
+                ('pickup_lat', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='خط عرض الاستلام')),
+                ('pickup_lng', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='خط طول الاستلام')),
+                ('dropoff_lat', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='خط عرض التسليم')),
+                ('dropoff_lng', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='خط طول التسليم')),
+                ('status', models.CharField(choices=[('PENDING', 'قيد المراجعة'), ('CONFIRMED', 'مؤكد'), ('ACTIVE', 'قيد الاستخدام'), ('COMPLETED', 'مكتمل'), ('CANCELLED', 'ملغي')], max_length=20, verbose_name='حالة الحجز')),
+                ('duration_days', models.IntegerField(default=0, verbose_name='مدة الحجز بالأيام')),
+                ('daily_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='سعر اليوم عند الحجز')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='السعر الإجمالي')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة')),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='vehicles.car', verbose_name='السيارة')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL, verbose_name='العميل')),
+            ],
+            options={
+                'verbose_name': 'حجز مؤرشف',
+                'verbose_name_plural': 'الحجوزات المؤرشفة',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='archived_booking_user_idx'), models.Index(fields=['-created_at', '-id'], name='archived_booking_created_idx'), models.Index(fields=['start_date'], name='archived_booking_start_idx')],
+            },
+        ),
+    ]
@@ -2,8 +2,11 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from vehicles.models import Car 
+from vehicles.models import Car, RentalCompany
 from datetime import timedelta
+from decimal import Decimal
+
+from pricing.engine import car_pricing, quote
 
 class Booking(models.Model):
     STATUS_CHOICES = [
@@ -14,6 +17,9 @@ class Booking(models.Model):
         ('CANCELLED', 'ملغي'),
     ]
 
+    # الحالات التي تحجز السيارة فعلياً وتمنع حجزاً متداخلاً
+    BLOCKING_STATUSES = ('CONFIRMED', 'ACTIVE')
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
@@ -84,6 +90,15 @@ class Booking(models.Model):
     # حقل لحساب الأيام
     duration_days = models.IntegerField(default=0, verbose_name="مدة الحجز بالأيام")
     
+    # متوسط سعر اليوم وقت التسعير، حتى لا يتغير الإجمالي إذا تغيرت الأسعار لاحقاً
+    daily_rate = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="سعر اليوم عند الحجز"
+    )
+
     total_price = models.DecimalField(
         max_digits=10, 
         decimal_places=2, 
@@ -96,11 +111,29 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # فحص التداخل: car_id = ? AND status IN (...) AND start_date < ? AND end_date > ?
+            models.Index(fields=['car', 'status', 'start_date', 'end_date'], name='booking_car_status_dates_idx'),
+            # حجوزات العميل في الملف الشخصي، الأحدث أولاً
+            models.Index(fields=['user', '-created_at'], name='booking_user_created_idx'),
+            # لوحة المراجعة: كل الحجوزات أو حالة واحدة، بترتيب صفحاتها (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='booking_status_created_idx'),
+            # الطلبات المعلقة قليلة مقارنة بالجدول؛ فهرس جزئي لها وحدها (انتهاء المهلة في lifecycle.py)
+            models.Index(fields=['created_at'], condition=models.Q(status='PENDING'), name='booking_pending_created_idx'),
+        ]
         verbose_name = "حجز"
         verbose_name_plural = "الحجوزات"
 
     def __str__(self):
         return f"Booking #{self.id} - {self.user} - {self.car}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # نحتفظ بالقيم كما قُرئت لنعرف ما تغير عند الحفظ دون استعلام إضافي (انظر rollups.py)
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     # دالة جديدة لحساب السعر والمدة
     def calculate_prices(self):
@@ -113,11 +146,23 @@ class Booking(models.Model):
         else:
             self.duration_days = 0
 
-        if self.car and self.duration_days > 0:
-            
-            self.total_price = self.car.daily_price * self.duration_days
-        else:
+        if self.duration_days <= 0 or not self.car_id:
             self.total_price = 0.00
+            return
+
+        # التسعير مرة واحدة عند الإنشاء أو عند تغيير السيارة/التواريخ، ثم يبقى الإجمالي ثابتاً
+        loaded = getattr(self, '_loaded_values', {})
+        changed = any(loaded.get(field) != getattr(self, field) for field in ('car_id', 'start_date', 'end_date'))
+        if self.daily_rate is None or changed:
+            self.total_price = quote(self._pricing_car(), timezone.localdate(self.start_date), self.duration_days)
+            # متوسط سعر اليوم للعرض فقط؛ الإجمالي هو المرجع
+            self.daily_rate = (self.total_price / self.duration_days).quantize(Decimal('0.01'))
+
+    def _pricing_car(self):
+        # إذا كانت السيارة محمّلة مسبقاً لا داعي لاستعلام إضافي
+        if Booking.car.is_cached(self):
+            return car_pricing(self.car)
+        return car_pricing(self.car_id)
 
 
     def clean(self):
@@ -128,7 +173,94 @@ class Booking(models.Model):
             if not self.pk and self.start_date < timezone.now():
                 raise ValidationError("لا يمكن الحجز في تاريخ قديم.")
 
+    # الحقول التي يعتمد عليها السعر؛ الحفظ الذي لا يلمسها لا يعيد الحساب
+    PRICING_FIELDS = {'car', 'car_id', 'start_date', 'end_date', 'daily_rate'}
+
     def save(self, *args, **kwargs):
-        
-        self.calculate_prices()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.PRICING_FIELDS.intersection(update_fields):
+            self.calculate_prices()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'daily_rate', 'duration_days', 'total_price'}
+        super().save(*args, **kwargs)
+
+    def set_status(self, status):
+        """Change the status only: one UPDATE of status/updated_at, no repricing."""
+        self.status = status
+        self.save(update_fields=['status', 'updated_at'])
+
+
+class BookingDailyRollup(models.Model):
+    """
+    Daily booking facts per car and status, maintained incrementally
+    (see rollups.py). A booking counts on the day it starts.
+    """
+    day = models.DateField(verbose_name="اليوم")
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='booking_rollups', verbose_name="السيارة")
+    rental_company = models.ForeignKey(
+        RentalCompany, on_delete=models.CASCADE, related_name='booking_rollups', verbose_name="شركة التأجير"
+    )
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, verbose_name="حالة الحجز")
+
+    bookings = models.IntegerField(default=0, verbose_name="عدد الحجوزات")
+    booked_days = models.IntegerField(default=0, verbose_name="أيام الحجز")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="الإيرادات")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'car', 'status'], name='booking_rollup_day_car_status_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['rental_company', 'day'], name='booking_rollup_company_day_idx'),
+        ]
+        verbose_name = "ملخص حجوزات يومي"
+        verbose_name_plural = "ملخصات الحجوزات اليومية"
+
+    def __str__(self):
+        return f"{self.day} - {self.car_id} - {self.status}"
+
+
+class ArchivedBooking(models.Model):
+    """
+    A COMPLETED/CANCELLED booking moved out of Booking (see archive.py).
+    Same id and fields as the original booking, read-only from here on.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_bookings', verbose_name="العميل"
+    )
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='archived_bookings', verbose_name="السيارة")
+
+    start_date = models.DateTimeField(verbose_name="تاريخ الاستلام")
+    end_date = models.DateTimeField(verbose_name="تاريخ التسليم")
+    pickup_location = models.CharField(max_length=255, verbose_name="موقع الاستلام (العنوان)")
+    dropoff_location = models.CharField(max_length=255, verbose_name="موقع التسليم (العنوان)")
+    pickup_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="خط عرض الاستلام")
+    pickup_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="خط طول الاستلام")
+    dropoff_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="خط عرض التسليم")
+    dropoff_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="خط طول التسليم")
+
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, verbose_name="حالة الحجز")
+    duration_days = models.IntegerField(default=0, verbose_name="مدة الحجز بالأيام")
+    daily_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="سعر اليوم عند الحجز")
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="السعر الإجمالي")
+
+    # كما كانت في الحجز الأصلي، لا تُحدّث تلقائياً
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الأرشفة")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # سجل العميل في صفحة الملف الشخصي
+            models.Index(fields=['user', '-created_at'], name='archived_booking_user_idx'),
+            models.Index(fields=['-created_at', '-id'], name='archived_booking_created_idx'),
+            # تقارير الإشغال على فترات قديمة
+            models.Index(fields=['start_date'], name='archived_booking_start_idx'),
+        ]
+        verbose_name = "حجز مؤرشف"
+        verbose_name_plural = "الحجوزات المؤرشفة"
+
+    def __str__(self):
+        return f"Archived booking #{self.id} - {self.user} - {self.car}"
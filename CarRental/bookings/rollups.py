@@ -0,0 +1,157 @@
+"""
+Daily booking rollups (BookingDailyRollup) for the dashboards.
+
+Every booking contributes one row's worth of facts -- 1 booking, its
+``duration_days`` and its ``total_price`` -- to the (start day, car, status)
+bucket it belongs to. Saves and deletes move those facts between buckets
+through signals (see signals.py); set-based status changes go through
+``services.transition_bookings``, which applies the same deltas for the
+whole set.
+``rebuild_rollups`` recomputes them from the Booking and ArchivedBooking
+tables in batches of cars and ``find_drift`` reports buckets that disagree with it (see the
+``rebuild_booking_rollups`` management command).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from vehicles.models import Car
+
+from .models import ArchivedBooking, Booking, BookingDailyRollup
+
+# الحقول التي يعتمد عليها موقع الحجز في الملخص وقيمه
+ROLLUP_FIELDS = ('car_id', 'start_date', 'status', 'duration_days', 'total_price')
+
+
+def snapshot(values):
+    """Rollup-relevant values of one booking, from an instance or a ``values()`` row."""
+    if isinstance(values, Booking):
+        values = {field: getattr(values, field) for field in ROLLUP_FIELDS}
+    if values['car_id'] is None or values['start_date'] is None:
+        return None
+    return tuple(values[field] for field in ROLLUP_FIELDS)
+
+
+def _bucket(state):
+    car_id, start_date, status, duration_days, total_price = state
+    return (timezone.localdate(start_date), car_id, status), (1, duration_days or 0, Decimal(total_price or 0))
+
+
+def collect_deltas(removed=(), added=()):
+    """``{(day, car_id, status): [bookings, booked_days, revenue]}`` for moving facts."""
+    deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+    for sign, states in ((-1, removed), (1, added)):
+        for state in states:
+            if state is None:
+                continue
+            key, measures = _bucket(state)
+            for i, value in enumerate(measures):
+                deltas[key][i] += sign * value
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def apply_deltas(deltas):
+    """Add the deltas to their buckets with ``F()`` updates, creating missing buckets."""
+    if not deltas:
+        return
+    companies = dict(
+        Car.objects.filter(pk__in={key[1] for key in deltas}).values_list('pk', 'rental_company_id')
+    )
+    for (day, car_id, status), (count, days, revenue) in deltas.items():
+        if car_id not in companies:
+            # السيارة حُذفت، وملخصاتها تُحذف معها
+            continue
+        bucket = BookingDailyRollup.objects.filter(day=day, car_id=car_id, status=status)
+        changes = {
+            'bookings': F('bookings') + count,
+            'booked_days': F('booked_days') + days,
+            'revenue': F('revenue') + revenue,
+        }
+        if bucket.update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                BookingDailyRollup.objects.create(
+                    day=day, car_id=car_id, rental_company_id=companies[car_id], status=status,
+                    bookings=count, booked_days=days, revenue=revenue,
+                )
+        except IntegrityError:
+            # عملية أخرى أنشأت نفس الصف للتو
+            bucket.update(**changes)
+
+
+def _expected(car_ids):
+    # الحجوزات المؤرشفة تبقى محسوبة في الملخصات (انظر archive.py)
+    expected = {}
+    for model in (Booking, ArchivedBooking):
+        rows = (
+            model.objects.filter(car_id__in=car_ids)
+            .annotate(day=TruncDate('start_date'))
+            .values('day', 'car_id', 'car__rental_company_id', 'status')
+            .annotate(n=Count('id'), days=Sum('duration_days'), revenue=Sum('total_price'))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['day'], row['car_id'], row['status'])
+            _, count, days, revenue = expected.get(key, (None, 0, 0, Decimal(0)))
+            expected[key] = (
+                row['car__rental_company_id'],
+                count + row['n'],
+                days + (row['days'] or 0),
+                revenue + (row['revenue'] or Decimal(0)),
+            )
+    return expected
+
+
+def _stored(car_ids):
+    rows = BookingDailyRollup.objects.filter(car_id__in=car_ids).values_list(
+        'day', 'car_id', 'status', 'rental_company_id', 'bookings', 'booked_days', 'revenue',
+    )
+    return {
+        (day, car_id, status): (company_id, count, days, revenue)
+        for day, car_id, status, company_id, count, days, revenue in rows
+        # صفوف أصبحت صفرية بعد النقل لا تعتبر انحرافاً
+        if count or days or revenue
+    }
+
+
+def _car_batches(batch_size):
+    last_id = 0
+    while True:
+        ids = list(Car.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def rebuild_rollups(batch_size=500):
+    """Recompute all rollups from Booking, ``batch_size`` cars per transaction."""
+    written = 0
+    for car_ids in _car_batches(batch_size):
+        expected = _expected(car_ids)
+        with transaction.atomic():
+            BookingDailyRollup.objects.filter(car_id__in=car_ids).delete()
+            BookingDailyRollup.objects.bulk_create([
+                BookingDailyRollup(
+                    day=day, car_id=car_id, status=status, rental_company_id=company_id,
+                    bookings=count, booked_days=days, revenue=revenue,
+                )
+                for (day, car_id, status), (company_id, count, days, revenue) in expected.items()
+            ], batch_size=1000)
+        written += len(expected)
+    return written
+
+
+def find_drift(batch_size=500):
+    """Yield ``(key, stored, expected)`` for every bucket that disagrees with Booking."""
+    for car_ids in _car_batches(batch_size):
+        expected = _expected(car_ids)
+        stored = _stored(car_ids)
+        for key in sorted(expected.keys() | stored.keys(), key=str):
+            if stored.get(key) != expected.get(key):
+                yield key, stored.get(key), expected.get(key)
@@ -0,0 +1,223 @@
+"""
+Booking writes that must not race.
+
+Creating or approving a booking re-checks overlaps while holding a lock on
+that car only, so requests for different cars never wait on each other.
+On PostgreSQL the lock is ``SELECT ... FOR UPDATE`` on the Car row and an
+exclusion constraint (migration 0006) rejects any overlap that slips past
+it. SQLite has a single writer anyway, so a process-wide lock is used
+there instead; it also covers the lookups of the car ids that precede the
+per-car locks (``_serialized``), which would otherwise race the writers.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from vehicles.models import Car
+
+from . import calendars
+from .availability import IntervalSet, availability
+from .models import Booking
+from .rollups import ROLLUP_FIELDS, apply_deltas, collect_deltas, snapshot
+
+# قابل لإعادة الدخول: _serialized ثم locked_cars في نفس الـ thread
+_fallback_lock = threading.RLock()
+
+
+class BookingConflict(Exception):
+    pass
+
+
+@contextmanager
+def locked_cars(car_ids):
+    """Open a transaction that holds the booking locks of these cars until commit."""
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            # ترتيب ثابت للأقفال يمنع الـ deadlock بين عمليتين جماعيتين
+            list(
+                Car.objects.select_for_update().filter(pk__in=set(car_ids))
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            yield
+    else:
+        with _fallback_lock, transaction.atomic():
+            yield
+
+
+def locked_car(car_id):
+    return locked_cars([car_id])
+
+
+def _serialized():
+    """The process-wide lock when the backend has no row locks, for reads made before ``locked_cars``."""
+    return nullcontext() if connection.features.has_select_for_update else _fallback_lock
+
+
+def _blocking_overlap(car_id, start, end, exclude_id=None):
+    qs = Booking.objects.filter(
+        car_id=car_id,
+        status__in=Booking.BLOCKING_STATUSES,
+        start_date__lt=end,
+        end_date__gt=start,
+    )
+    if exclude_id is not None:
+        qs = qs.exclude(pk=exclude_id)
+    return qs.exists()
+
+
+def transition_bookings(queryset, status, **extra):
+    """
+    Set ``status`` on every booking in ``queryset`` with one UPDATE and keep
+    the derived data in step (rollups, month calendars, availability index),
+    since ``update()`` sends no signals. Must run inside a transaction: the
+    rows are locked while they are read so that a concurrent transition of
+    the same booking cannot apply its deltas twice. Returns the updated ids.
+    """
+    rows = list(queryset.select_for_update().values('id', 'end_date', *ROLLUP_FIELDS))
+    if not rows:
+        return []
+    ids = [row['id'] for row in rows]
+    Booking.objects.filter(pk__in=ids).update(status=status, updated_at=timezone.now(), **extra)
+
+    old = [snapshot(row) for row in rows]
+    new = [snapshot({**row, 'status': status, **extra}) for row in rows]
+    apply_deltas(collect_deltas(removed=old, added=new))
+    for car_id in {row['car_id'] for row in rows}:
+        transaction.on_commit(lambda car_id=car_id: availability.invalidate(car_id))
+    for row in rows:
+        calendars.booking_changed(
+            (row['car_id'], row['start_date'], row['end_date'], row['status']),
+            (row['car_id'], row['start_date'], row['end_date'], status),
+        )
+    return ids
+
+
+def place_booking(booking):
+    """Save a new (PENDING) booking unless the car is already taken."""
+    try:
+        with locked_car(booking.car_id):
+            if _blocking_overlap(booking.car_id, booking.start_date, booking.end_date):
+                raise BookingConflict("عذراً، السيارة محجوزة بالفعل في هذه الفترة.")
+            booking.save()
+    except IntegrityError:
+        raise BookingConflict("عذراً، السيارة محجوزة بالفعل في هذه الفترة.")
+    return booking
+
+
+def approve_booking(booking_id):
+    """
+    Confirm a PENDING booking and cancel the PENDING requests it overlaps.
+    Returns ``(booking, cancelled_count)``.
+    """
+    with _serialized():
+        return _approve_booking(booking_id)
+
+
+def _approve_booking(booking_id):
+    car_id = Booking.objects.filter(pk=booking_id).values_list('car_id', flat=True).first()
+    if car_id is None:
+        raise Booking.DoesNotExist(booking_id)
+
+    try:
+        with locked_car(car_id):
+            # نعيد القراءة تحت القفل: ربما عالجه مراجع آخر أو انتهت صلاحيته للتو
+            booking = Booking.objects.select_for_update().get(pk=booking_id)
+            if booking.status != 'PENDING':
+                raise BookingConflict(f'Booking #{booking.id} was already processed.')
+            if _blocking_overlap(car_id, booking.start_date, booking.end_date, exclude_id=booking.id):
+                raise BookingConflict(f'Booking #{booking.id} overlaps a confirmed booking for this car.')
+
+            booking.set_status('CONFIRMED')
+
+            cancelled = len(transition_bookings(
+                Booking.objects.filter(
+                    car_id=car_id,
+                    status='PENDING',
+                    start_date__lte=booking.end_date,
+                    end_date__gte=booking.start_date,
+                ).exclude(id=booking.id),
+                'CANCELLED',
+            ))
+    except IntegrityError:
+        raise BookingConflict(f'Booking #{booking_id} overlaps a confirmed booking for this car.')
+
+    return booking, cancelled
+
+
+def bulk_review(booking_ids, action):
+    """
+    Approve or reject many bookings in one transaction.
+
+    Returns ``{booking_id: outcome}`` where outcome is one of 'approved',
+    'rejected', 'cancelled' (lost to another approved request), 'conflict'
+    (overlaps an existing confirmed booking) or 'skipped' (not PENDING).
+    """
+    booking_ids = {int(pk) for pk in booking_ids}
+    outcomes = {pk: 'skipped' for pk in booking_ids}
+    with _serialized():
+        car_ids = set(Booking.objects.filter(pk__in=booking_ids).values_list('car_id', flat=True))
+        if car_ids:
+            _bulk_review(booking_ids, car_ids, action, outcomes)
+    return outcomes
+
+
+def _bulk_review(booking_ids, car_ids, action, outcomes):
+    with locked_cars(car_ids):
+        selected = list(
+            Booking.objects.select_for_update().filter(pk__in=booking_ids, status='PENDING')
+            .order_by('created_at', 'id')
+            .values_list('id', 'car_id', 'start_date', 'end_date')
+        )
+        if action == 'reject':
+            ids = transition_bookings(Booking.objects.filter(pk__in=[row[0] for row in selected]), 'CANCELLED')
+            outcomes.update(dict.fromkeys(ids, 'rejected'))
+        else:
+            _bulk_approve(selected, car_ids, outcomes)
+
+
+def _bulk_approve(selected, car_ids, outcomes):
+    if not selected:
+        return
+    window_start = min(row[2] for row in selected)
+    window_end = max(row[3] for row in selected)
+
+    # الحجوزات المؤكدة الحالية في النافذة: استعلام واحد لكل السيارات
+    taken = defaultdict(IntervalSet)
+    for pk, car_id, start, end in Booking.objects.filter(
+        car_id__in=car_ids,
+        status__in=Booking.BLOCKING_STATUSES,
+        start_date__lt=window_end,
+        end_date__gt=window_start,
+    ).values_list('id', 'car_id', 'start_date', 'end_date'):
+        taken[car_id].add(start, end, pk)
+
+    # الأقدم طلباً يفوز عند تعارض طلبين محددين
+    approved = []
+    for pk, car_id, start, end in selected:
+        if taken[car_id].is_free(start, end):
+            taken[car_id].add(start, end, pk)
+            approved.append(pk)
+            outcomes[pk] = 'approved'
+        else:
+            outcomes[pk] = 'conflict'
+    if not approved:
+        return
+
+    transition_bookings(Booking.objects.filter(pk__in=approved), 'CONFIRMED')
+
+    # إلغاء كل طلب معلق يتقاطع مع أي حجز تمت الموافقة عليه — بعملية واحدة على مستوى المجموعة
+    overlaps_approved = Booking.objects.filter(
+        pk__in=approved,
+        car_id=OuterRef('car_id'),
+        start_date__lte=OuterRef('end_date'),
+        end_date__gte=OuterRef('start_date'),
+    )
+    losers = Booking.objects.filter(car_id__in=car_ids, status='PENDING').filter(Exists(overlaps_approved))
+    cancelled = transition_bookings(losers, 'CANCELLED')
+    for pk in cancelled:
+        if pk in outcomes:
+            outcomes[pk] = 'cancelled'
@@ -0,0 +1,76 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from vehicles.models import Car, RentalCompany
+
+from . import calendars
+from .availability import availability
+from .models import Booking
+from .rollups import apply_deltas, collect_deltas, snapshot
+
+# القيم السابقة التي تحتاجها الفهارس والملخصات لمعرفة ما تغير
+TRACKED_FIELDS = ('car_id', 'start_date', 'end_date', 'status', 'duration_days', 'total_price')
+
+
+def _current_values(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+def _calendar_state(values):
+    return values and (values['car_id'], values['start_date'], values['end_date'], values['status'])
+
+
+@receiver(pre_save, sender=Booking)
+def remember_old_state(sender, instance, **kwargs):
+    instance._old_values = None
+    if not instance.pk:
+        return
+
+    # القيم كما قُرئت (انظر Booking.from_db)، وإلا استعلام واحد بالمفتاح
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if all(field in loaded for field in TRACKED_FIELDS):
+        instance._old_values = {field: loaded[field] for field in TRACKED_FIELDS}
+    else:
+        instance._old_values = Booking.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, update_fields=None, **kwargs):
+    old = getattr(instance, '_old_values', None)
+    new = _current_values(instance)
+    if update_fields is not None and old is not None:
+        # حفظ جزئي: الحقول غير المحفوظة تبقى كما في قاعدة البيانات
+        new = {
+            field: value if field in update_fields or field.removesuffix('_id') in update_fields else old[field]
+            for field, value in new.items()
+        }
+
+    # بعد الـ commit فقط: حجز أُلغيت معاملته لا يبقى تعارضاً وهمياً في الفهرس
+    transaction.on_commit(partial(
+        availability.booking_saved,
+        instance.pk, new['car_id'], new['start_date'], new['end_date'], new['status'], old and old['car_id'],
+    ))
+    apply_deltas(collect_deltas(removed=[old and snapshot(old)], added=[snapshot(new)]))
+    calendars.booking_changed(_calendar_state(old), _calendar_state(new))
+
+    # الحفظ التالي لنفس الكائن يبدأ من القيم المحفوظة الآن
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **new}
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, origin=None, **kwargs):
+    transaction.on_commit(partial(availability.booking_deleted, instance.pk, instance.car_id))
+
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    old = {field: loaded[field] if field in loaded else getattr(instance, field) for field in TRACKED_FIELDS}
+    calendars.booking_changed(_calendar_state(old), None)
+    if isinstance(origin, (Car, RentalCompany)):
+        # ملخصات السيارة تُحذف معها في نفس العملية
+        return
+    if getattr(origin, 'archiving', False):
+        # نُقل إلى الأرشيف (archive.py) ويبقى محسوباً في الملخصات
+        return
+    apply_deltas(collect_deltas(removed=[snapshot(old)]))
@@ -1,3 +1,580 @@
-from django.test import TestCase
+import csv
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+import pyarrow.parquet as pq
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import close_old_connections, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from CarRental.query_plans import QueryPlanTestCase, analyze
+from payments.models import RentalPayment
+from vehicles.models import Car, CarReview, RentalCompany
+
+from .archive import archive_closed
+from .availability import INDEXED_STATUSES, IntervalSet, availability
+from .exports import export_all
+from .lifecycle import BATCH_SIZE, PENDING_TTL, due_bookings, run_lifecycle, transitions
+from .models import ArchivedBooking, Booking, BookingDailyRollup
+from .rollups import find_drift
+from .services import BookingConflict, approve_booking, bulk_review
+
+logger = logging.getLogger(__name__)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentApprovalTests(TransactionTestCase):
+    """Many reviewers approving overlapping requests at the same moment (needs real row locks)."""
+
+    CARS = 4
+    REQUESTS_PER_CAR = 8
+
+    def setUp(self):
+        company = RentalCompany.objects.create(name='Stress Rentals')
+        user = User.objects.create_user('stress@example.com', password='x')
+        start = timezone.now() + timedelta(days=10)
+        self.pending = []
+        for i in range(self.CARS):
+            car = Car.objects.create(
+                rental_company=company, brand='Toyota', model_name=f'Camry {i}',
+                description='-', daily_price=100, plate_number=f'STR {i}',
+            )
+            for j in range(self.REQUESTS_PER_CAR):
+                # كل الطلبات لنفس السيارة تتداخل مع بعضها
+                booking = Booking.objects.create(
+                    user=user, car=car,
+                    start_date=start + timedelta(hours=j),
+                    end_date=start + timedelta(days=3, hours=j),
+                )
+                self.pending.append(booking.id)
+
+    def test_no_double_booking_under_concurrent_approvals(self):
+        barrier = threading.Barrier(len(self.pending))
+        outcomes = []
+        lock = threading.Lock()
+
+        def approve(booking_id):
+            try:
+                barrier.wait()
+                try:
+                    approve_booking(booking_id)
+                    result = 'approved'
+                except BookingConflict:
+                    result = 'rejected'
+                except Exception as exc:
+                    result = f'{type(exc).__name__}: {exc}'
+                with lock:
+                    outcomes.append(result)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=approve, args=(pk,)) for pk in self.pending]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        throughput = f'{len(outcomes)} approval attempts in {elapsed:.3f}s ({len(outcomes) / elapsed:.1f}/s)'
+        logger.info('Concurrent approvals: %s', throughput)
+
+        unexpected = [result for result in outcomes if result not in ('approved', 'rejected')]
+        self.assertEqual(unexpected, [], throughput)
+        self.assertEqual(len(outcomes), len(self.pending), throughput)
+        self.assertEqual(outcomes.count('approved'), self.CARS)
+        for car in Car.objects.all():
+            confirmed = car.bookings.filter(status__in=Booking.BLOCKING_STATUSES)
+            self.assertEqual(confirmed.count(), 1)
+            self.assertEqual(car.bookings.filter(status='PENDING').count(), 0)
+
+
+class BookingQueryPlanTests(QueryPlanTestCase):
+    """The hot booking queries must stay on their indexes as the table grows."""
+
+    CARS = 500
+    USERS = 200
+    BOOKINGS = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Plan Rentals')
+        cls.cars = Car.objects.bulk_create([
+            Car(rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=100, plate_number=f'PLN {i}')
+            for i in range(cls.CARS)
+        ])
+        cls.users = User.objects.bulk_create([User(username=f'plan{i}') for i in range(cls.USERS)])
+        cls.now = timezone.now()
+        # كما في الواقع: معظم الحجوزات مغلقة، والقليل منها معلق أو جارٍ
+        statuses = ['PENDING', 'CONFIRMED', 'ACTIVE'] + ['COMPLETED'] * 60 + ['CANCELLED'] * 37
+        Booking.objects.bulk_create([
+            Booking(
+                user=cls.users[i % cls.USERS], car=cls.cars[i % cls.CARS],
+                start_date=cls.now - timedelta(hours=i), end_date=cls.now - timedelta(hours=i - 30),
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(cls.BOOKINGS)
+        ], batch_size=2000)
+        analyze()
+
+    def test_profile_history(self):
+        user = self.users[0]
+        self.assertIndexedPlan(Booking.objects.filter(user=user).order_by('-created_at'), ordered=True)
+        self.assertIndexedPlan(ArchivedBooking.objects.filter(user=user).order_by('-created_at'), ordered=True)
+
+    def test_reviewer_dashboard_pages(self):
+        self.assertIndexedPlan(Booking.objects.order_by('-created_at', '-id')[:26], ordered=True)
+        self.assertIndexedPlan(
+            Booking.objects.filter(status='PENDING').order_by('-created_at', '-id')[:26], ordered=True,
+        )
+
+    def test_overlap_check(self):
+        overlapping = Booking.objects.filter(
+            car=self.cars[0], status__in=Booking.BLOCKING_STATUSES,
+            start_date__lt=self.now + timedelta(days=3), end_date__gt=self.now,
+        ).order_by()
+        self.assertIndexedPlan(overlapping)
+
+    def test_lifecycle_transitions(self):
+        for name, _, condition in transitions(self.now):
+            with self.subTest(name):
+                self.assertIndexedPlan(due_bookings(condition)[:BATCH_SIZE])
+
+
+class CarCalendarViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Calendar Rentals')
+        cls.car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='CAL 1',
+        )
+
+    def test_out_of_range_month_falls_back_to_current(self):
+        url = reverse('bookings:car_calendar', args=[self.car.pk])
+        today = timezone.localdate()
+        for month in ('9999-12', '0-1', '2024-13', 'x'):
+            with self.subTest(month=month):
+                response = self.client.get(url, {'month': month})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['month'], f'{today:%Y-%m}')
+        self.assertEqual(self.client.get(url, {'month': '9998-12'}).json()['days'], 31)
+
+
+class BookingQuoteViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Quote Rentals')
+        cls.car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='QTE 1',
+        )
+
+    def test_rejects_huge_or_out_of_range_windows(self):
+        url = reverse('bookings:booking_quote', args=[self.car.pk])
+        for start, end in (('9999-12-30', '9999-12-31'), ('0001-01-01', '9999-12-31'), ('2024-01-01', '2025-01-02')):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self.client.get(url, {'start': start, 'end': end}).status_code, 400)
+
+        response = self.client.get(url, {'start': '9998-12-01', 'end': '9998-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['duration_days'], 31)
+
+
+class FleetUtilizationWindowTests(TestCase):
+
+    def test_view_rejects_huge_or_out_of_range_windows(self):
+        staff = User.objects.create_user('staff@example.com', password='x', is_staff=True)
+        self.client.force_login(staff)
+        url = reverse('bookings:fleet_utilization')
+        for start, end in (('0001-01-01', '9998-12-31'), ('9999-12-01', '9999-12-31'), ('2024-01-01', '2025-01-02')):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(self.client.get(url, {'start': start, 'end': end}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2024-01-01', 'end': '2024-12-31'}).status_code, 200)
+
+    def test_fleet_grid_rejects_out_of_range_start(self):
+        staff = User.objects.create_user('grid@example.com', password='x', is_staff=True)
+        self.client.force_login(staff)
+        url = reverse('bookings:fleet_grid')
+        for start, days in (('9999-12-31', '1'), ('9999-12-31', '2'), ('9999-01-01', '30'), ('9998-12-31', '366')):
+            with self.subTest(start=start, days=days):
+                self.assertEqual(self.client.get(url, {'start': start, 'days': days}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '9998-12-31', 'days': '1'}).status_code, 200)
+
+    def test_command_rejects_huge_or_invalid_windows(self):
+        for start, end in (('0001-01-01', '9998-12-31'), ('2024-02-30', '2024-03-05'), ('2024-03-05', '2024-03-01')):
+            with self.subTest(start=start, end=end), self.assertRaises(CommandError):
+                call_command('fleet_utilization', start=start, end=end)
+
+
+class AvailabilityIndexTests(TestCase):
+
+    def test_interval_set_updates_match_rebuild(self):
+        rng = random.Random(0)
+        intervals = IntervalSet()
+        live = {}
+        for _ in range(2000):
+            booking_id = rng.randrange(200)
+            if booking_id in live and rng.random() < 0.5:
+                intervals.discard(booking_id)
+                del live[booking_id]
+            else:
+                start = rng.randrange(1000)
+                live[booking_id] = (start, start + rng.randrange(1, 50))
+                intervals.add(*live[booking_id], booking_id)
+
+            start = rng.randrange(1000)
+            end = start + rng.randrange(1, 30)
+            expected = sorted(pk for pk, (s, e) in live.items() if s < end and e > start)
+            self.assertEqual(sorted(intervals.conflicts(start, end)), expected)
+            self.assertEqual(intervals.is_free(start, end), not expected)
+            after = rng.randrange(1000)
+            slot = intervals.next_free_slot(after, 10)
+            self.assertGreaterEqual(slot, after)
+            self.assertTrue(intervals.is_free(slot, slot + 10))
+
+        self.assertEqual(list(intervals), sorted((s, e, pk) for pk, (s, e) in live.items()))
+
+        def check(node):
+            # كل عقدة تحمل أقصى نهاية في شجرتها الفرعية
+            if node is None:
+                return None
+            ends = [node.item[1], check(node.left), check(node.right)]
+            self.assertEqual(node.max_end, max(end for end in ends if end is not None))
+            return node.max_end
+
+        check(intervals._root)
+
+    def test_index_changes_wait_for_commit(self):
+        company = RentalCompany.objects.create(name='Index Rentals')
+        car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='IDX 1',
+        )
+        user = User.objects.create_user('index@example.com', password='x')
+        start = timezone.now() + timedelta(days=5)
+        end = start + timedelta(days=2)
+        self.assertTrue(availability.is_free(car.pk, start, end))
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Booking.objects.create(user=user, car=car, start_date=start, end_date=end, status='CONFIRMED')
+            raise RuntimeError
+        self.assertTrue(availability.is_free(car.pk, start, end))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(user=user, car=car, start_date=start, end_date=end, status='CONFIRMED')
+        self.assertFalse(availability.is_free(car.pk, start, end))
+
+
+class RollupDriftTests(TestCase):
+    """Every write path keeps BookingDailyRollup equal to a recount of the bookings."""
+
+    def test_writes_keep_rollups_in_step(self):
+        company = RentalCompany.objects.create(name='Rollup Rentals')
+        cars = [
+            Car.objects.create(
+                rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=100 + i * 50, plate_number=f'RLP {i}',
+            )
+            for i in range(2)
+        ]
+        user = User.objects.create_user('rollup@example.com', password='x')
+        start = timezone.now() + timedelta(days=20)
+
+        def book(car, offset, days=2, **fields):
+            return Booking.objects.create(
+                user=user, car=car, start_date=start + timedelta(days=offset),
+                end_date=start + timedelta(days=offset + days), **fields,
+            )
+
+        moved = book(cars[0], 0)
+        moved.start_date += timedelta(days=3)
+        moved.end_date += timedelta(days=4)
+        moved.save()
+        moved.car = cars[1]
+        moved.save()
+        moved.set_status('CONFIRMED')
+
+        # الموافقة تلغي الطلبات المتداخلة عبر transition_bookings
+        approved = book(cars[0], 10)
+        book(cars[0], 11)
+        approve_booking(approved.pk)
+        rejected = book(cars[0], 30)
+        bulk_review([rejected.pk], 'reject')
+        book(cars[1], 40).delete()
+        # الأرشيف يبقى محسوباً في الملخصات
+        old = book(cars[0], -400, status='COMPLETED')
+        Booking.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        archive_closed(months=12)
+
+        self.assertTrue(ArchivedBooking.objects.filter(pk=old.pk).exists())
+        self.assertTrue(BookingDailyRollup.objects.exists())
+        self.assertEqual(list(find_drift()), [])
+
+
+class LifecycleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Lifecycle Rentals')
+        cls.car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='LCY 1',
+        )
+        cls.user = User.objects.create_user('lifecycle@example.com', password='x')
+        cls.now = timezone.now()
+
+    def book(self, status, start, end, created_ago=timedelta(0)):
+        booking = Booking.objects.create(
+            user=self.user, car=self.car, status=status,
+            start_date=self.now + start, end_date=self.now + end,
+        )
+        Booking.objects.filter(pk=booking.pk).update(created_at=self.now - created_ago)
+        return booking
+
+    def status(self, booking):
+        return Booking.objects.values_list('status', flat=True).get(pk=booking.pk)
+
+    def test_each_transition(self):
+        day = timedelta(days=1)
+        started = self.book('CONFIRMED', -day, day)
+        upcoming = self.book('CONFIRMED', 2 * day, 3 * day)
+        ended = self.book('CONFIRMED', -3 * day, -2 * day)
+        active_ended = self.book('ACTIVE', -5 * day, -4 * day)
+        still_active = self.book('ACTIVE', -day, 4 * day)
+        stale = self.book('PENDING', 10 * day, 11 * day, created_ago=PENDING_TTL + timedelta(hours=1))
+        fresh = self.book('PENDING', 12 * day, 13 * day, created_ago=PENDING_TTL - timedelta(hours=1))
+        past_start = self.book('PENDING', -timedelta(hours=1), 2 * day)
+
+        counts = run_lifecycle(now=self.now)
+
+        self.assertEqual(counts, {'activated': 1, 'completed': 2, 'expired': 2})
+        expected = {
+            started: 'ACTIVE', upcoming: 'CONFIRMED', ended: 'COMPLETED', active_ended: 'COMPLETED',
+            still_active: 'ACTIVE', stale: 'CANCELLED', fresh: 'PENDING', past_start: 'CANCELLED',
+        }
+        self.assertEqual({booking: self.status(booking) for booking in expected}, expected)
+        # لا شيء مستحق في التشغيل التالي
+        self.assertEqual(run_lifecycle(now=self.now), {'activated': 0, 'completed': 0, 'expired': 0})
+
+    def test_loops_until_backlog_is_cleared(self):
+        day = timedelta(days=1)
+        ended = [self.book('CONFIRMED', -(i + 2) * day, -(i + 1) * day) for i in range(7)]
+
+        # 7 صفوف بدفعات من 3: ثلاث دفعات (3 + 3 + 1)
+        self.assertEqual(run_lifecycle(now=self.now, batch_size=3)['completed'], 7)
+        self.assertEqual({self.status(booking) for booking in ended}, {'COMPLETED'})
+
+        # عدد مساوٍ لحجم الدفعة يحتاج دفعة فارغة أخيرة للتوقف
+        exact = [self.book('PENDING', (i + 20) * day, (i + 21) * day, created_ago=2 * PENDING_TTL) for i in range(3)]
+        self.assertEqual(run_lifecycle(now=self.now, batch_size=3)['expired'], 3)
+        self.assertEqual({self.status(booking) for booking in exact}, {'CANCELLED'})
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        company = RentalCompany.objects.create(name='Export Rentals')
+        self.cars = [
+            Car.objects.create(
+                rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=100, plate_number=f'EXP {i}',
+            )
+            for i in range(2)
+        ]
+        self.user = User.objects.create_user('export@example.com', password='x')
+        start = timezone.now() + timedelta(days=5)
+        self.booking = Booking.objects.create(
+            user=self.user, car=self.cars[0], start_date=start, end_date=start + timedelta(days=2),
+        )
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        self.runs = 0
+
+    def export(self, tables=('bookings', 'cars')):
+        # كل تشغيل بوقت مختلف (اسم ملف مختلف) وبعد مهلة الاستقرار
+        self.runs += 1
+        now = timezone.now() + timedelta(minutes=5, seconds=self.runs)
+        results = export_all(self.output, tables=tables, now=now)
+        return {name: rows for name, (rows, _) in results.items()}
+
+    def read(self, name):
+        return pq.read_table(os.path.join(self.output, name)).to_pylist()
+
+    def test_round_trip_then_incremental(self):
+        self.assertEqual(self.export(), {'bookings': 1, 'cars': 2})
+        cars = {row['id']: row for row in self.read('cars')}
+        self.assertEqual(set(cars), {car.pk for car in self.cars})
+        self.assertEqual(cars[self.cars[0].pk]['plate_number'], 'EXP 0')
+        self.assertEqual(cars[self.cars[0].pk]['daily_price'], self.cars[0].daily_price)
+        self.assertNotIn('search_document', cars[self.cars[0].pk])
+        [booking] = self.read('bookings')
+        self.assertEqual((booking['id'], booking['car_id']), (self.booking.pk, self.cars[0].pk))
+        self.assertEqual(booking['start_date'], self.booking.start_date)
+
+        # لا تغيير: التشغيل الثاني لا يكتب شيئاً
+        self.assertEqual(self.export(), {'bookings': 0, 'cars': 0})
+        self.assertEqual(len(self.read('cars')), 2)
+
+        # تعديل السعر أو التوفر أو التقييم يعيد تصدير السيارة المعنية فقط
+        car = self.cars[1]
+        car.daily_price = 150
+        car.save()
+        self.assertEqual(self.export(), {'bookings': 0, 'cars': 1})
+        CarReview.objects.create(car=self.cars[0], user=self.user, rating=4)
+        Car.objects.get(pk=car.pk).save(update_fields=['is_available'])
+        self.assertEqual(self.export(), {'bookings': 0, 'cars': 2})
+
+        latest = {}
+        for row in sorted(self.read('cars'), key=lambda row: row['updated_at']):
+            latest[row['id']] = row
+        self.assertEqual(latest[car.pk]['daily_price'], 150)
+        self.assertEqual(latest[self.cars[0].pk]['rating_avg'], 4.0)
+
+    def test_edited_payments_and_reviews_are_exported_again(self):
+        tables = ('payments', 'reviews')
+        review = CarReview.objects.create(car=self.cars[0], user=self.user, rating=2)
+        RentalPayment.objects.create(rental_booking=self.booking, transaction_id='T-1', amount=200)
+        self.assertEqual(self.export(tables), {'payments': 1, 'reviews': 1})
+        self.assertEqual(self.export(tables), {'payments': 0, 'reviews': 0})
+
+        # كما في initiate_payment: إعادة محاولة الدفع تعيد كتابة الدفعة الموجودة
+        RentalPayment.objects.update_or_create(
+            rental_booking=self.booking, defaults={'transaction_id': 'T-2', 'status': 'PENDING_PAYLINK'},
+        )
+        review.rating = 5
+        review.save()
+        self.assertEqual(self.export(tables), {'payments': 1, 'reviews': 1})
+
+        payments = sorted(self.read('payments'), key=lambda row: row['updated_at'])
+        self.assertEqual([row['transaction_id'] for row in payments], ['T-1', 'T-2'])
+        reviews = sorted(self.read('reviews'), key=lambda row: row['updated_at'])
+        self.assertEqual([row['rating'] for row in reviews], [2, 5])
+
+
+class BookingCsvExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Csv Rentals')
+        cls.car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='CSV 1',
+        )
+        cls.user = User.objects.create_user('csv@example.com', email='csv@example.com', password='x')
+        start = timezone.now() + timedelta(days=5)
+        cls.live = Booking.objects.create(
+            user=cls.user, car=cls.car, start_date=start, end_date=start + timedelta(days=2),
+        )
+        RentalPayment.objects.create(rental_booking=cls.live, transaction_id='CSV-1', amount=200, status='COMPLETED')
+        old = Booking.objects.create(
+            user=cls.user, car=cls.car, status='COMPLETED',
+            start_date=start - timedelta(days=400), end_date=start - timedelta(days=398),
+        )
+        Booking.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        archive_closed(months=12)
+        cls.archived = ArchivedBooking.objects.get(pk=old.pk)
+        cls.staff = User.objects.create_user('csv-staff', password='x', is_staff=True)
+
+    def export(self, **params):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('bookings:export_bookings_csv'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def rows(self, **params):
+        return list(csv.DictReader(self.export(**params)))
+
+    def test_streams_archived_then_live_rows(self):
+        lines = self.export()
+        header = next(csv.reader(lines))
+        self.assertEqual(header[:3], ['id', 'status', 'created_at'])
+        self.assertIn('payment_status', header)
+
+        archived, live = csv.DictReader(lines)
+        self.assertEqual((archived['id'], archived['status']), (str(self.archived.pk), 'COMPLETED'))
+        self.assertEqual(archived['payment_status'], '')
+        self.assertEqual(archived['plate_number'], 'CSV 1')
+        self.assertEqual((live['id'], live['status']), (str(self.live.pk), 'PENDING'))
+        self.assertEqual((live['payment_status'], live['email'], live['company']), ('COMPLETED', 'csv@example.com', 'Csv Rentals'))
+        self.assertEqual(live['total_price'], str(self.live.total_price))
+
+    def test_status_filter_skips_the_archive_when_it_cannot_match(self):
+        self.assertEqual([row['id'] for row in self.rows(status='PENDING')], [str(self.live.pk)])
+        self.assertEqual([row['id'] for row in self.rows(status='COMPLETED')], [str(self.archived.pk)])
+
+
+class BulkReviewTests(TestCase):
+
+    def setUp(self):
+        # الفهرس مشترك في العملية، وقد يحمل سيارات بنفس المعرفات من اختبارات سابقة
+        availability.invalidate()
+
+    def test_bulk_approve_and_reject_keep_derived_data_in_step(self):
+        company = RentalCompany.objects.create(name='Bulk Rentals')
+        busy, free = [
+            Car.objects.create(
+                rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=100, plate_number=f'BLK {i}',
+            )
+            for i in range(2)
+        ]
+        user = User.objects.create_user('bulk@example.com', password='x')
+        start = timezone.now() + timedelta(days=5)
+
+        def book(car, offset, days=3, status='PENDING'):
+            return Booking.objects.create(
+                user=user, car=car, status=status,
+                start_date=start + timedelta(days=offset), end_date=start + timedelta(days=offset + days),
+            ).pk
+
+        book(busy, 0, status='CONFIRMED')
+        first = book(free, 10)
+        second = book(free, 11)
+        unselected = book(free, 12)
+        blocked = book(busy, 1)
+        confirmed = book(free, 30, status='CONFIRMED')
+        horizon = (start - timedelta(days=1), start + timedelta(days=60))
+
+        def indexed():
+            return {car.pk: sorted(availability.conflicts(car.pk, *horizon, include_pending=True)) for car in (busy, free)}
+
+        def stored():
+            live = Booking.objects.filter(status__in=INDEXED_STATUSES).order_by('pk')
+            return {car.pk: list(live.filter(car=car).values_list('pk', flat=True)) for car in (busy, free)}
+
+        # الفهرس محمّل قبل المراجعة، فيجب أن يُبطل بعد الالتزام
+        self.assertEqual(indexed(), stored())
+        with self.captureOnCommitCallbacks(execute=True):
+            outcomes = bulk_review([first, second, blocked, confirmed], 'approve')
+
+        # الأقدم يفوز، ومنافسه المحدد وغير المحدد يُلغيان؛ المتعارض مع حجز مؤكد يبقى معلقاً
+        self.assertEqual(outcomes, {first: 'approved', second: 'cancelled', blocked: 'conflict', confirmed: 'skipped'})
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[pk] for pk in (first, second, unselected, blocked)],
+            ['CONFIRMED', 'CANCELLED', 'CANCELLED', 'PENDING'],
+        )
+        self.assertFalse(availability.is_free(free.pk, start + timedelta(days=12), start + timedelta(days=13)))
+        self.assertEqual(indexed(), stored())
+        self.assertEqual(list(find_drift()), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(bulk_review([blocked, first], 'reject'), {blocked: 'rejected', first: 'skipped'})
+        self.assertEqual(Booking.objects.get(pk=blocked).status, 'CANCELLED')
+        self.assertEqual(indexed(), stored())
+        self.assertEqual(list(find_drift()), [])
 
-# Create your tests here.
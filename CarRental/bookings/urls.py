@@ -5,6 +5,11 @@ app_name = 'bookings'
 
 urlpatterns = [
     path('create/<int:car_id>/', views.create_booking, name='create_booking'),
+    path('quote/<int:car_id>/', views.booking_quote, name='booking_quote'),
+    path('calendar/<int:car_id>/', views.car_calendar, name='car_calendar'),
     path('success/', views.booking_success, name='booking_success'),
     path('dashboard/', views.reviewer_dashboard, name='reviewer_dashboard'),
+    path('dashboard/export.csv', views.export_bookings_csv, name='export_bookings_csv'),
+    path('dashboard/fleet-grid/', views.fleet_grid, name='fleet_grid'),
+    path('dashboard/utilization/', views.fleet_utilization_report, name='fleet_utilization'),
 ]
\ No newline at end of file
@@ -1,12 +1,72 @@
+import csv
+from datetime import timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Sum, Q
 from django.urls import reverse 
-from .models import Booking
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import ArchivedBooking, Booking, BookingDailyRollup
 from .forms import BookingForm
-from vehicles.models import Car 
+from .availability import is_range_free
+from .calendars import midnight, month_calendar
+from .analytics import check_window, default_window, fleet_utilization
+from .archive import ARCHIVED_STATUSES
+from .fleet_grid import DEFAULT_DAYS, MAX_DAYS, build_grid
+from .services import BookingConflict, approve_booking, bulk_review, place_booking
+from vehicles.models import Car, RentalCompany
+from pricing.engine import cached_quote, car_pricing
+from CarRental.pagination import paginate, cursor_querystring
+
+BOOKINGS_PER_PAGE = 25
+EXPORT_CHUNK_SIZE = 2000
+
+# (عنوان العمود، الحقل) لتصدير CSV
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('status', 'status'),
+    ('created_at', 'created_at'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('duration_days', 'duration_days'),
+    ('daily_rate', 'daily_rate'),
+    ('total_price', 'total_price'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('car_id', 'car_id'),
+    ('car', 'car__brand'),
+    ('model', 'car__model_name'),
+    ('plate_number', 'car__plate_number'),
+    ('company', 'car__rental_company__name'),
+    ('payment_status', 'payment__status'),
+    ('pickup_location', 'pickup_location'),
+    ('pickup_lat', 'pickup_lat'),
+    ('pickup_lng', 'pickup_lng'),
+    ('dropoff_location', 'dropoff_location'),
+    ('dropoff_lat', 'dropoff_lat'),
+    ('dropoff_lng', 'dropoff_lng'),
+]
+# الحجوزات المؤرشفة ليس لها دفعات (انظر archive.py)
+EXPORT_PAYMENT_COLUMN = [field for _, field in EXPORT_COLUMNS].index('payment__status')
 
+BULK_OUTCOME_MESSAGES = {
+    'approved': (messages.SUCCESS, 'Approved'),
+    'rejected': (messages.WARNING, 'Rejected'),
+    'cancelled': (messages.WARNING, 'Cancelled (overlaps another approved booking)'),
+    'conflict': (messages.WARNING, 'Not approved (overlaps a confirmed booking)'),
+    'skipped': (messages.INFO, 'Skipped (already processed)'),
+}
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
 
 
 @login_required(login_url='accounts:login')
@@ -21,9 +81,14 @@ def create_booking(request, car_id):
             booking.user = request.user
             booking.car = car
 
-            booking.save() 
-            messages.success(request, "تم حجز السيارة بنجاح! بانتظار الموافقة.")
-            return redirect('bookings:booking_success')
+            # الحفظ يعيد فحص التداخل تحت قفل خاص بهذه السيارة
+            try:
+                place_booking(booking)
+            except BookingConflict as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, "تم حجز السيارة بنجاح! بانتظار الموافقة.")
+                return redirect('bookings:booking_success')
 
             # return redirect(reverse('payments:initiate_payment', args=[booking.id]))
 
@@ -36,6 +101,50 @@ def create_booking(request, car_id):
         'car': car
     })
 
+@require_GET
+def car_calendar(request, car_id):
+    # ?month=YYYY-MM (الافتراضي: الشهر الحالي)
+    today = timezone.localdate()
+    try:
+        year, month = map(int, request.GET.get('month', '').split('-'))
+        # 9998 حداً أعلى: حساب نهاية الشهر يتجاوز آخر تاريخ في 9999-12
+        if not 1 <= month <= 12 or not 1 <= year <= 9998:
+            raise ValueError
+    except ValueError:
+        year, month = today.year, today.month
+
+    get_object_or_404(Car.objects.only('id'), pk=car_id)
+    return JsonResponse({'car': car_id, **month_calendar(car_id, year, month)})
+
+@require_GET
+def booking_quote(request, car_id):
+    # نفس حساب Booking.calculate_prices دون حفظ أو تحقق من النموذج
+    start = _parse_date(request.GET.get('start'))
+    end = _parse_date(request.GET.get('end'))
+    if start is None or end is None or end <= start:
+        return JsonResponse({'error': 'تواريخ غير صالحة.'}, status=400)
+    try:
+        # نفس حدود تقرير الإشغال: صف الأسعار يُبنى لكل يوم من الفترة
+        check_window(start, end)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    try:
+        car = car_pricing(car_id)
+    except Car.DoesNotExist:
+        return JsonResponse({'error': 'السيارة غير موجودة.'}, status=404)
+
+    duration = max(1, (end - start).days + 1)
+    total = cached_quote(car, start, duration)
+    return JsonResponse({
+        'car': car_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'duration_days': duration,
+        'total_price': str(total),
+        'available': is_range_free(car_id, midnight(start), midnight(end)),
+    })
+
 # 2. صفحة نجاح الحجز 
 @login_required
 def booking_success(request):
@@ -45,8 +154,26 @@ def booking_success(request):
 @login_required
 @user_passes_test(lambda u: u.is_staff or u.is_superuser)
 def reviewer_dashboard(request):
-    bookings = Booking.objects.all().order_by('-created_at')
+    # كل ما يعرضه صف الجدول يُجلب في نفس الاستعلام (بدل 5 استعلامات لكل حجز)
+    bookings = Booking.objects.select_related('user', 'user__profile', 'car', 'car__rental_company')
     
+    if request.method == "POST" and request.POST.get('bulk_action') in ('approve', 'reject'):
+        booking_ids = [pk for pk in request.POST.getlist('booking_ids') if pk.isdigit()]
+        if not booking_ids:
+            messages.info(request, 'No bookings selected.')
+            return redirect('bookings:reviewer_dashboard')
+
+        outcomes = bulk_review(booking_ids, request.POST['bulk_action'])
+
+        # رسالة واحدة لكل نتيجة بدل رسالة لكل حجز
+        grouped = {}
+        for booking_id, outcome in sorted(outcomes.items()):
+            grouped.setdefault(outcome, []).append(f'#{booking_id}')
+        for outcome, ids in grouped.items():
+            level, label = BULK_OUTCOME_MESSAGES[outcome]
+            messages.add_message(request, level, f'{label}: {", ".join(ids)}')
+        return redirect('bookings:reviewer_dashboard')
+
     if request.method == "POST":
         booking_id = request.POST.get('booking_id')
         action = request.POST.get('action')
@@ -54,45 +181,170 @@ def reviewer_dashboard(request):
         
         if action == 'approve':
 
-            booking.status = 'CONFIRMED'
-            booking.save()
+            try:
+                booking, count = approve_booking(booking.id)
+            except BookingConflict as e:
+                messages.warning(request, str(e))
+                return redirect('bookings:reviewer_dashboard')
+
             messages.success(request, f'Booking #{booking.id} Approved')
             
-            #  إلغاء الحجوزات المتعارضة تلقائيا (Conflict Resolution)
-            # نبحث عن أي حجوزات أخرى (Pending) لنفس السيارة تتقاطع مع تواريخ هذا الحجز
-
-            conflicting_bookings = Booking.objects.filter(
-                car=booking.car,
-                status='PENDING',
-                start_date__lte=booking.end_date,
-                end_date__gte=booking.start_date
-            ).exclude(id=booking.id)
-
-            count = conflicting_bookings.count()
+            #  الحجوزات المعلقة المتعارضة تُلغى تلقائياً داخل approve_booking (Conflict Resolution)
             if count > 0:
-                conflicting_bookings.update(status='CANCELLED')
                 messages.warning(request, f'تم إلغاء {count} طلبات معلقة أخرى تلقائياً لمنع التعارض في التواريخ.')
 
         elif action == 'reject':
-            booking.status = 'CANCELLED'
-            booking.save()
+            booking.set_status('CANCELLED')
             messages.warning(request, f'Booking #{booking.id} Rejected')
         
         return redirect('bookings:reviewer_dashboard')
 
 
-    total_revenue = bookings.filter(status='CONFIRMED').aggregate(Sum('total_price'))['total_price__sum'] or 0
+    # الإحصائيات من جدول الملخصات اليومية بدل المرور على كل الحجوزات
+    stats = BookingDailyRollup.objects.aggregate(
+        total_bookings=Sum('bookings'),
+        pending_count=Sum('bookings', filter=Q(status='PENDING')),
+        confirmed_count=Sum('bookings', filter=Q(status='CONFIRMED')),
+        total_revenue=Sum('revenue', filter=Q(status='CONFIRMED')),
+    )
+    stats = {key: value or 0 for key, value in stats.items()}
 
-    stats = {
-        'total_bookings': bookings.count(),
-        'pending_count': bookings.filter(status='PENDING').count(),
-        'confirmed_count': bookings.filter(status='CONFIRMED').count(),
-        'total_revenue': total_revenue
-    }
+    # ?archived=1: الحجوزات المغلقة المنقولة إلى الأرشيف بدل الحجوزات الحية
+    show_archived = request.GET.get('archived') == '1'
+    if show_archived:
+        bookings = ArchivedBooking.objects.select_related('user', 'user__profile', 'car', 'car__rental_company')
+
+    status_filter = request.GET.get('status')
+    if status_filter in dict(Booking.STATUS_CHOICES):
+        bookings = bookings.filter(status=status_filter)
+
+    page = paginate(bookings, ('-created_at', '-id'), request.GET.get('cursor'), BOOKINGS_PER_PAGE)
 
     context = {
-        'bookings': bookings,
+        'bookings': page,
+        'page': page,
+        'next_query': cursor_querystring(request, page.next_cursor) if page.has_next else None,
+        'previous_query': cursor_querystring(request, page.previous_cursor) if page.has_previous else None,
+        'selected_status': status_filter,
+        'show_archived': show_archived,
+        'status_choices': Booking.STATUS_CHOICES,
         'stats': stats
     }
 
-    return render(request, 'bookings/reviewer_dashboard.html', context)
\ No newline at end of file
+    return render(request, 'bookings/reviewer_dashboard.html', context)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+def fleet_utilization_report(request):
+    start, end = default_window(timezone.localdate())
+    start = _parse_date(request.GET.get('start')) or start
+    end = _parse_date(request.GET.get('end')) or end
+    if end < start:
+        start, end = end, start
+    try:
+        check_window(start, end)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    company_id = request.GET.get('company')
+    company_id = int(company_id) if company_id and company_id.isdigit() else None
+
+    report = fleet_utilization(start, end, company_id=company_id)
+    return render(request, 'bookings/fleet_utilization.html', {
+        'report': report,
+        'companies': RentalCompany.objects.order_by('name').values_list('id', 'name'),
+        'selected_company': company_id,
+    })
+
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+@require_GET
+def fleet_grid(request):
+    """
+    Cars x days booked-bit grid. Query parameters: ``start`` (date), ``days``,
+    ``company``, ``format=bin``, ``free=<date>,<date>...`` (cars free on all
+    of them) and ``window=<n>`` (each car's first n free days).
+    """
+    start = _parse_date(request.GET.get('start')) or timezone.localdate()
+    days = request.GET.get('days', '')
+    days = min(int(days), MAX_DAYS) if days.isdigit() and int(days) > 0 else DEFAULT_DAYS
+    company_id = request.GET.get('company')
+    company_id = int(company_id) if company_id and company_id.isdigit() else None
+    try:
+        # نفس حد السنة في check_window: نهاية الجدول تُحسب كبداية اليوم التالي
+        check_window(start, start + timedelta(days=days - 1))
+    except OverflowError:
+        return HttpResponseBadRequest('تاريخ البداية خارج النطاق.')
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    grid = build_grid(start, days, company_id=company_id)
+    if request.GET.get('format') == 'bin':
+        return HttpResponse(grid.to_bytes(), content_type='application/octet-stream')
+
+    data = grid.to_json()
+    if request.GET.get('free'):
+        wanted = [_parse_date(value) for value in request.GET['free'].split(',')]
+        data['free_cars'] = grid.free_for([day for day in wanted if day])
+    window = request.GET.get('window', '')
+    if window.isdigit():
+        data['first_free_window'] = {
+            car_id: day.isoformat() for car_id, day in grid.first_free_window(int(window)).items()
+        }
+    return JsonResponse(data)
+
+
+
+class _Echo:
+    """csv.writer target that hands each row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+@require_GET
+def export_bookings_csv(request):
+    """
+    Bookings as CSV, archived ones first, streamed in chunks from a
+    server-side cursor. Filters: ``status``, ``company``, ``start``/``end``
+    (pick-up date range, inclusive).
+    """
+    status_filter = request.GET.get('status')
+    company_id = request.GET.get('company')
+    start = _parse_date(request.GET.get('start'))
+    end = _parse_date(request.GET.get('end'))
+
+    def filtered(bookings):
+        if status_filter in dict(Booking.STATUS_CHOICES):
+            bookings = bookings.filter(status=status_filter)
+        if company_id and company_id.isdigit():
+            bookings = bookings.filter(car__rental_company_id=company_id)
+        if start:
+            bookings = bookings.filter(start_date__gte=midnight(start))
+        if end:
+            bookings = bookings.filter(start_date__lt=midnight(end + timedelta(days=1)))
+        return bookings.order_by('id')
+
+    fields = [field for _, field in EXPORT_COLUMNS]
+    rows = filtered(Booking.objects).values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    archived_rows = ()
+    if status_filter not in dict(Booking.STATUS_CHOICES) or status_filter in ARCHIVED_STATUSES:
+        del fields[EXPORT_PAYMENT_COLUMN]
+        archived_rows = filtered(ArchivedBooking.objects).values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield writer.writerow([header for header, _ in EXPORT_COLUMNS])
+        for row in archived_rows:
+            yield writer.writerow(row[:EXPORT_PAYMENT_COLUMN] + (None,) + row[EXPORT_PAYMENT_COLUMN:])
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="bookings-{timezone.localdate():%Y%m%d}.csv"'
+    return response
@@ -18,4 +18,19 @@ class ContactMessage(models.Model):
     class Meta:
         verbose_name = "Contact Message"
         verbose_name_plural = "Contact Messages"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='contact_message_created_idx'),
+        ]
+
+class CacheVersion(models.Model):
+    """
+    Current version of a family of cached values (see main/versions.py).
+    Kept in the database so that every process sees a bump at once.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    # قيمة عشوائية جديدة مع كل تغيير: لا تتكرر حتى لو أُلغيت معاملة رفعتها
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.name} {self.version}"
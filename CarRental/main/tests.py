@@ -1,3 +1,17 @@
-from django.test import TestCase
+from CarRental.query_plans import QueryPlanTestCase, analyze
 
-# Create your tests here.
+from .models import ContactMessage
+
+
+class ContactMessageQueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ContactMessage.objects.bulk_create([
+            ContactMessage(name='Visitor', email=f'visitor{i}@example.com', subject='Hello', message='-')
+            for i in range(5000)
+        ], batch_size=1000)
+        analyze()
+
+    def test_latest_messages(self):
+        self.assertIndexedPlan(ContactMessage.objects.order_by('-created_at')[:50], ordered=True)
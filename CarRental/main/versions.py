@@ -0,0 +1,35 @@
+"""
+Database-backed version tokens for process-local caches.
+
+Each gunicorn worker (and each management command) has its own cache, so a
+version kept in the cache itself only invalidates the process that bumped
+it, and an evicted version key silently restarts. Instead the version of
+each family of cached values is a CacheVersion row: readers fetch it (one
+primary-key query for several names) and build their cache keys from it,
+and writers bump it in the same transaction as the change, so the new
+version becomes visible exactly when the change commits.
+
+A bump stores a fresh random token rather than incrementing a counter: a
+counter would come back to an old value after a rolled-back bump (or a
+test rollback) and match entries cached under it. A name that was never
+bumped reads as ``'0'``.
+"""
+import uuid
+
+from .models import CacheVersion
+
+
+def get_versions(*names):
+    """``{name: version}`` for ``names``, in one query."""
+    versions = dict.fromkeys(names, '0')
+    versions.update(CacheVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return versions
+
+
+def get_version(name):
+    return get_versions(name)[name]
+
+
+def bump(name):
+    """Invalidate every value cached under ``name``'s current version."""
+    CacheVersion.objects.update_or_create(name=name, defaults={'version': uuid.uuid4().hex})
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    RentalPayment = apps.get_model('payments', 'RentalPayment')
+    # الدفعات الحالية تبدأ بتاريخ إنشائها، فعلامة التصدير القديمة (على created_at) تبقى صحيحة
+    RentalPayment.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalpayment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
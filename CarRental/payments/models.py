@@ -32,6 +32,8 @@ class RentalPayment(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
+    # initiate_payment يعيد كتابة الدفعة الموجودة (update_or_create)، وهذه علامة التصدير
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Payment for Booking #{self.rental_booking.id} - {self.status}"
\ No newline at end of file
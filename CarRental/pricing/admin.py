@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import PricingRule
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'rental_company', 'multiplier', 'start_date', 'end_date', 'weekdays', 'min_days', 'fuel_type', 'is_active')
+    list_filter = ('kind', 'rental_company', 'is_active')
+    search_fields = ('name',)
+    list_editable = ('multiplier', 'is_active')
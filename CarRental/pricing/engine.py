@@ -0,0 +1,159 @@
+"""
+Pricing engine: rules compiled into per-car daily price rows.
+
+For each car, the active rules of its company (plus the company-less,
+global rules) are compiled into a NumPy row holding the price of every day
+from the first of the current month for ``PRICING_HORIZON_DAYS`` days:
+
+    price(day) = daily_price x season(day) x weekday(day) x fuel
+
+where each factor is the product of the matching rules' multipliers. A
+quote is then a slice sum over that row, times the length-of-rental
+multiplier of the longest ``min_days`` tier the rental reaches.
+
+Rows are cached under a key built from the rule versions of the car's
+company and of the global rules, plus the car's own price and fuel type.
+Changing a rule bumps only its company's version (see signals.py), so only
+that company's cars get recompiled, and only when they are next quoted.
+The versions live in the database (``main.versions``), not in the cache:
+the cache is per process, and a rule saved in one worker must reach the
+others. Quotes outside the cached horizon compile a one-off row for their
+range.
+
+``cached_quote`` additionally memoizes whole quotes in a bounded, per-process
+LRU keyed by (car, rule version, start, days), for the quote endpoint.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from main.versions import bump, get_versions
+from vehicles.models import Car
+
+from .models import PricingRule
+
+HORIZON_DAYS = getattr(settings, 'PRICING_HORIZON_DAYS', 400)
+CACHE_TIMEOUT = 60 * 60 * 24
+QUOTE_MEMO_SIZE = getattr(settings, 'PRICING_QUOTE_MEMO_SIZE', 4096)
+
+CarPricing = namedtuple('CarPricing', 'pk rental_company_id daily_price fuel_type')
+Rule = namedtuple('Rule', 'kind multiplier start_date end_date weekdays min_days fuel_type')
+
+_CENT = Decimal('0.01')
+
+
+def _version_name(company_id):
+    return f'pricing:{company_id or "global"}'
+
+
+def bump_version(company_id=None):
+    """Invalidate the compiled rows of one company (``None``: the global rules)."""
+    bump(_version_name(company_id))
+
+
+def rule_version(company_id):
+    """Token that changes whenever the rules applying to ``company_id``'s cars change."""
+    versions = get_versions(_version_name(None), _version_name(company_id))
+    return '{}.{}'.format(versions[_version_name(None)], versions[_version_name(company_id)])
+
+
+def car_pricing(car):
+    """CarPricing from a Car instance or a car id (one query)."""
+    if isinstance(car, Car):
+        return CarPricing(car.pk, car.rental_company_id, car.daily_price, car.fuel_type)
+    row = Car.objects.filter(pk=car).values_list('pk', 'rental_company_id', 'daily_price', 'fuel_type').first()
+    if row is None:
+        raise Car.DoesNotExist(car)
+    return CarPricing(*row)
+
+
+def company_rules(company_id, version=None):
+    version = version or rule_version(company_id)
+    key = f'pricing:rules:{company_id}:{version}'
+    rules = cache.get(key)
+    if rules is None:
+        # قواعد الشركة + القواعد العامة (بلا شركة)
+        rows = PricingRule.objects.filter(
+            Q(rental_company__isnull=True) | Q(rental_company_id=company_id), is_active=True,
+        ).values_list('kind', 'multiplier', 'start_date', 'end_date', 'weekdays', 'min_days', 'fuel_type')
+        rules = [
+            Rule(kind, float(multiplier), start, end,
+                 tuple(int(d) for d in weekdays.split(',') if d.strip()), min_days, fuel_type)
+            for kind, multiplier, start, end, weekdays, min_days, fuel_type in rows
+        ]
+        cache.set(key, rules, CACHE_TIMEOUT)
+    return rules
+
+
+def compile_row(car, rules, origin, days):
+    """Daily prices of ``car`` for ``days`` days from ``origin`` (length discounts excluded)."""
+    dates = np.arange(np.datetime64(origin, 'D'), np.datetime64(origin + timedelta(days=days), 'D'))
+    # 1970-01-01 كان يوم خميس (4 بترقيم ISO)
+    weekday = (dates.astype(np.int64) + 3) % 7 + 1
+    row = np.full(days, float(car.daily_price))
+    for rule in rules:
+        if rule.kind == 'season':
+            row[(dates >= np.datetime64(rule.start_date)) & (dates <= np.datetime64(rule.end_date))] *= rule.multiplier
+        elif rule.kind == 'weekend':
+            row[np.isin(weekday, rule.weekdays)] *= rule.multiplier
+        elif rule.kind == 'fuel' and rule.fuel_type == car.fuel_type:
+            row *= rule.multiplier
+    return row
+
+
+def length_multiplier(rules, days):
+    tiers = [rule for rule in rules if rule.kind == 'length' and rule.min_days and rule.min_days <= days]
+    if not tiers:
+        return 1.0
+    return max(tiers, key=lambda rule: rule.min_days).multiplier
+
+
+def price_row(car, version=None):
+    """``(origin, row)``: the car's compiled prices over the cached horizon."""
+    version = version or rule_version(car.rental_company_id)
+    origin = timezone.localdate().replace(day=1)
+    key = f'pricing:row:{car.pk}:{origin:%Y%m}:{version}.{car.daily_price}.{car.fuel_type}'
+    row = cache.get(key)
+    if row is None:
+        row = compile_row(car, company_rules(car.rental_company_id, version), origin, HORIZON_DAYS)
+        cache.set(key, row, CACHE_TIMEOUT)
+    return origin, row
+
+
+def quote(car, start, days, version=None):
+    """
+    Total price (Decimal) of renting ``car`` for ``days`` days from the date
+    ``start``. ``version`` is the car's ``rule_version``, when already known.
+    """
+    car = car if isinstance(car, CarPricing) else car_pricing(car)
+    if days <= 0:
+        return Decimal('0.00')
+
+    version = version or rule_version(car.rental_company_id)
+    origin, row = price_row(car, version)
+    rules = company_rules(car.rental_company_id, version)
+    offset = (start - origin).days
+    if 0 <= offset and offset + days <= len(row):
+        daily = row[offset:offset + days]
+    else:
+        daily = compile_row(car, rules, start, days)
+    total = float(daily.sum()) * length_multiplier(rules, days)
+    return Decimal(repr(total)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+@lru_cache(maxsize=QUOTE_MEMO_SIZE)
+def _memoized_quote(car, version, start, days):
+    return quote(car, start, days, version)
+
+
+def cached_quote(car, start, days):
+    """``quote`` memoized until the car's price or its rules change."""
+    car = car if isinstance(car, CarPricing) else car_pricing(car)
+    return _memoized_quote(car, rule_version(car.rental_company_id), start, days)
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('vehicles', '0007_car_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='اسم القاعدة')),
+                ('kind', models.CharField(choices=[('season', 'موسم (فترة تواريخ)'), ('weekend', 'أيام الأسبوع'), ('length', 'خصم مدة الإيجار'), ('fuel', 'نوع الوقود')], max_length=10, verbose_name='نوع القاعدة')),
+                ('multiplier', models.DecimalField(decimal_places=3, help_text='1.200 = زيادة 20%، 0.900 = خصم 10%', max_digits=6, verbose_name='المعامل')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='من تاريخ')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='إلى تاريخ (ضمناً)')),
+                ('weekdays', models.CharField(blank=True, help_text='أرقام الأيام مفصولة بفواصل: 1=الاثنين ... 7=الأحد (مثال: 5,6 للجمعة والسبت)', max_length=13, verbose_name='أيام الأسبوع')),
+                ('min_days', models.PositiveIntegerField(blank=True, null=True, verbose_name='الحد الأدنى للأيام')),
+                ('fuel_type', models.CharField(blank=True, choices=[('petrol', 'بنزين'), ('diesel', 'ديزل'), ('hybrid', 'هجين'), ('electric', 'كهرباء')], max_length=10, verbose_name='نوع الوقود')),
+                ('is_active', models.BooleanField(default=True, verbose_name='مفعلة')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('rental_company', models.ForeignKey(blank=True, help_text='اتركها فارغة لتطبيق القاعدة على كل الشركات', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='vehicles.rentalcompany', verbose_name='شركة التأجير')),
+            ],
+            options={
+                'verbose_name': 'قاعدة تسعير',
+                'verbose_name_plural': 'قواعد التسعير',
+                'ordering': ['kind', 'name'],
+            },
+        ),
+    ]
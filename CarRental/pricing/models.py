@@ -0,0 +1,81 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from vehicles.models import Car, RentalCompany
+
+
+class PricingRule(models.Model):
+    """
+    One price adjustment. Every matching rule multiplies the car's daily
+    price; see engine.py for how they are combined.
+    """
+    KIND_CHOICES = [
+        ('season', 'موسم (فترة تواريخ)'),
+        ('weekend', 'أيام الأسبوع'),
+        ('length', 'خصم مدة الإيجار'),
+        ('fuel', 'نوع الوقود'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="اسم القاعدة")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="نوع القاعدة")
+    rental_company = models.ForeignKey(
+        RentalCompany,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='pricing_rules',
+        verbose_name="شركة التأجير",
+        help_text="اتركها فارغة لتطبيق القاعدة على كل الشركات",
+    )
+    multiplier = models.DecimalField(
+        max_digits=6, decimal_places=3, verbose_name="المعامل",
+        help_text="1.200 = زيادة 20%، 0.900 = خصم 10%",
+    )
+
+    # season
+    start_date = models.DateField(null=True, blank=True, verbose_name="من تاريخ")
+    end_date = models.DateField(null=True, blank=True, verbose_name="إلى تاريخ (ضمناً)")
+    # weekend
+    weekdays = models.CharField(
+        max_length=13, blank=True, verbose_name="أيام الأسبوع",
+        help_text="أرقام الأيام مفصولة بفواصل: 1=الاثنين ... 7=الأحد (مثال: 5,6 للجمعة والسبت)",
+    )
+    # length
+    min_days = models.PositiveIntegerField(null=True, blank=True, verbose_name="الحد الأدنى للأيام")
+    # fuel
+    fuel_type = models.CharField(max_length=10, choices=Car.FUEL_CHOICES, blank=True, verbose_name="نوع الوقود")
+
+    is_active = models.BooleanField(default=True, verbose_name="مفعلة")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['kind', 'name']
+        verbose_name = "قاعدة تسعير"
+        verbose_name_plural = "قواعد التسعير"
+
+    def __str__(self):
+        return f"{self.name} (×{self.multiplier})"
+
+    def weekday_numbers(self):
+        return [int(day) for day in self.weekdays.split(',') if day.strip()]
+
+    def clean(self):
+        if self.multiplier is not None and self.multiplier <= 0:
+            raise ValidationError({'multiplier': "المعامل يجب أن يكون أكبر من صفر."})
+        if self.kind == 'season':
+            if not self.start_date or not self.end_date:
+                raise ValidationError("قاعدة الموسم تحتاج تاريخ بداية ونهاية.")
+            if self.end_date < self.start_date:
+                raise ValidationError({'end_date': "تاريخ النهاية قبل تاريخ البداية."})
+        elif self.kind == 'weekend':
+            try:
+                days = self.weekday_numbers()
+            except ValueError:
+                days = None
+            if not days or not all(1 <= day <= 7 for day in days):
+                raise ValidationError({'weekdays': "أدخل أرقام أيام بين 1 و 7 مفصولة بفواصل."})
+        elif self.kind == 'length' and not self.min_days:
+            raise ValidationError({'min_days': "خصم المدة يحتاج الحد الأدنى للأيام."})
+        elif self.kind == 'fuel' and not self.fuel_type:
+            raise ValidationError({'fuel_type': "اختر نوع الوقود."})
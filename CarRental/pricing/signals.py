@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .engine import bump_version
+from .models import PricingRule
+
+
+@receiver(pre_save, sender=PricingRule)
+def remember_old_company(sender, instance, **kwargs):
+    # إذا نُقلت القاعدة لشركة أخرى يجب إعادة بناء جداول الشركتين
+    instance._old_company_ids = []
+    if instance.pk:
+        instance._old_company_ids = list(
+            PricingRule.objects.filter(pk=instance.pk).values_list('rental_company_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=PricingRule)
+def rule_saved(sender, instance, **kwargs):
+    bump_version(instance.rental_company_id)
+    for old in getattr(instance, '_old_company_ids', []):
+        if old != instance.rental_company_id:
+            bump_version(old)
+
+
+@receiver(post_delete, sender=PricingRule)
+def rule_deleted(sender, instance, **kwargs):
+    bump_version(instance.rental_company_id)
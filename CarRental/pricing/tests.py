@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from vehicles.models import Car, RentalCompany
+
+from .engine import HORIZON_DAYS, car_pricing, cached_quote, quote, rule_version
+from .models import PricingRule
+
+
+class PricingEngineTests(TestCase):
+    """Quotes combine every matching rule; saving or deleting a rule reprices at once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = RentalCompany.objects.create(name='Price Rentals')
+        cls.other = RentalCompany.objects.create(name='Other Rentals')
+        cls.car = Car.objects.create(
+            rental_company=cls.company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='PRC 1', fuel_type='diesel',
+        )
+        cls.other_car = Car.objects.create(
+            rental_company=cls.other, brand='Kia', model_name='Rio', description='-',
+            daily_price=100, plate_number='PRC 2', fuel_type='petrol',
+        )
+        # أول اثنين بعد أسبوعين، داخل الجدول المخزن
+        day = timezone.localdate() + timedelta(days=14)
+        cls.monday = day + timedelta(days=-day.weekday() % 7)
+
+    def rule(self, kind, multiplier, company=None, **fields):
+        return PricingRule.objects.create(
+            name=kind, kind=kind, multiplier=Decimal(multiplier), rental_company=company, **fields,
+        )
+
+    def test_no_rules(self):
+        self.assertEqual(quote(self.car, self.monday, 3), Decimal('300.00'))
+
+    def test_rules_multiply_and_respect_scope(self):
+        self.rule('fuel', '1.100', fuel_type='diesel')
+        self.rule('season', '1.500', self.company, start_date=self.monday, end_date=self.monday)
+        self.rule('season', '3.000', self.other, start_date=self.monday, end_date=self.monday)
+        self.rule('fuel', '2.000', is_active=False, fuel_type='diesel')
+
+        # الاثنين: 100 × 1.1 (وقود، عامة) × 1.5 (موسم الشركة)؛ قاعدة الشركة الأخرى والمعطلة لا تُطبق
+        self.assertEqual(quote(self.car, self.monday, 1), Decimal('165.00'))
+        self.assertEqual(quote(self.car, self.monday + timedelta(days=1), 1), Decimal('110.00'))
+        self.assertEqual(quote(self.other_car, self.monday, 1), Decimal('300.00'))
+
+    def test_date_and_weekday_windows(self):
+        tuesday = self.monday + timedelta(days=1)
+        self.rule('season', '2.000', start_date=tuesday, end_date=tuesday + timedelta(days=1))
+        self.rule('weekend', '1.500', weekdays='5,6')
+
+        # من الاثنين إلى الأحد: 100 + 200 + 200 + 100 + 150 + 150 + 100
+        self.assertEqual(quote(self.car, self.monday, 7), Decimal('1000.00'))
+        self.assertEqual(quote(self.car, self.monday + timedelta(days=4), 2), Decimal('300.00'))
+
+    def test_length_discount_uses_longest_tier_reached(self):
+        self.rule('length', '0.900', min_days=3)
+        self.rule('length', '0.800', min_days=7)
+
+        self.assertEqual(quote(self.car, self.monday, 2), Decimal('200.00'))
+        self.assertEqual(quote(self.car, self.monday, 3), Decimal('270.00'))
+        self.assertEqual(quote(self.car, self.monday, 10), Decimal('800.00'))
+
+    def test_totals_match_inside_and_outside_cached_horizon(self):
+        self.rule('weekend', '1.250', weekdays='6,7')
+        self.rule('length', '0.950', min_days=5)
+        far_monday = self.monday + timedelta(weeks=(HORIZON_DAYS // 7) + 2)
+
+        # (5 × 100 + 2 × 125) × 0.95، من الجدول المخزن ومن صف يُبنى لهذه الفترة فقط
+        self.assertEqual(quote(self.car, self.monday, 7), Decimal('712.50'))
+        self.assertEqual(quote(self.car, far_monday, 7), Decimal('712.50'))
+
+    def test_saving_and_deleting_rules_reprices(self):
+        car = car_pricing(self.car.pk)
+        self.assertEqual(cached_quote(car, self.monday, 2), Decimal('200.00'))
+        version = rule_version(self.company.pk)
+
+        rule = self.rule('season', '1.200', self.company, start_date=self.monday, end_date=self.monday)
+        self.assertNotEqual(rule_version(self.company.pk), version)
+        self.assertEqual(cached_quote(car, self.monday, 2), Decimal('220.00'))
+
+        rule.multiplier = Decimal('1.500')
+        rule.save()
+        self.assertEqual(cached_quote(car, self.monday, 2), Decimal('250.00'))
+
+        # نقل القاعدة لشركة أخرى يعيد تسعير الشركتين
+        other_version = rule_version(self.other.pk)
+        rule.rental_company = self.other
+        rule.save()
+        self.assertNotEqual(rule_version(self.other.pk), other_version)
+        self.assertEqual(cached_quote(car, self.monday, 2), Decimal('200.00'))
+        self.assertEqual(cached_quote(self.other_car, self.monday, 1), Decimal('150.00'))
+
+        rule.delete()
+        self.assertEqual(cached_quote(self.other_car, self.monday, 1), Decimal('100.00'))
+
+    def test_global_rule_reprices_every_company(self):
+        versions = rule_version(self.company.pk), rule_version(self.other.pk)
+        self.rule('fuel', '1.200', fuel_type='petrol')
+        self.assertNotEqual((rule_version(self.company.pk), rule_version(self.other.pk)), versions)
+        self.assertEqual(cached_quote(self.other_car, self.monday, 1), Decimal('120.00'))
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from .search import install_sqlite_fts
+
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and 'vehicles_car' in connection.introspection.table_names():
+        with connection.schema_editor() as schema_editor:
+            install_sqlite_fts(schema_editor)
 
 
 class VehiclesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vehicles'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(ensure_search_index, sender=self)
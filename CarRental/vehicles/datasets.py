@@ -0,0 +1,306 @@
+"""
+Deterministic synthetic datasets for load tests and benchmarks.
+
+``DatasetGenerator.run`` fills the database with companies, cars, users
+and profiles, bookings, payments and reviews. It inserts them in that
+(foreign-key) order, in batches, inside one transaction. The same ``seed``,
+sizes and ``anchor`` date always produce the same rows.
+
+Bookings follow each car's timeline. CONFIRMED/ACTIVE/COMPLETED bookings
+never overlap on a car, matching the real overlap check. Some PENDING and
+CANCELLED requests do overlap them, the way competing requests do.
+Statuses follow the anchor:
+- past rentals are COMPLETED, or CANCELLED;
+- the running one is ACTIVE;
+- future ones are CONFIRMED or PENDING.
+Every confirmed, active or completed booking gets a COMPLETED payment.
+Reviews come from completed rentals, at most one per car and user.
+
+Rows are generated as plain tuples and written by ``bulk_insert``, a
+batched multi-row INSERT. It works like ``bulk_create`` without the
+per-object model machinery, which is what allows 100k+ rows/s. Because
+``save()`` and signals are skipped, the fields they maintain are filled
+here (search keys, prices) or rebuilt by ``generate`` at the end (rating
+aggregates, daily rollups). No pricing rules are created, so a booking's
+price is ``daily_price x duration_days``, the same as
+``pricing.engine.quote``.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from bookings.models import Booking
+from bookings.rollups import rebuild_rollups
+from payments.models import RentalPayment
+
+from .models import Car, CarReview, RentalCompany
+from .normalization import normalize_text
+from .ratings import rebuild_ratings
+from .search import build_search_document
+
+BATCH_SIZE = 5000
+
+# (الشركة المصنعة، الموديلات، أقل سعر يومي)
+CATALOG = [
+    ('Toyota', ['Camry', 'Corolla', 'Yaris', 'Land Cruiser', 'Hilux'], 120),
+    ('Hyundai', ['Accent', 'Elantra', 'Sonata', 'Tucson'], 100),
+    ('Nissan', ['Sunny', 'Altima', 'Patrol'], 110),
+    ('Kia', ['Rio', 'Cerato', 'Sportage'], 95),
+    ('Ford', ['Taurus', 'Explorer', 'Expedition'], 180),
+    ('GMC', ['Yukon', 'Sierra'], 400),
+    ('Chevrolet', ['Tahoe', 'Malibu'], 250),
+    ('Lexus', ['ES', 'LX'], 500),
+    ('Mercedes-Benz', ['C-Class', 'E-Class', 'S-Class'], 600),
+    ('Lucid', ['Air'], 1200),
+    ('تويوتا', ['كامري', 'هايلكس'], 150),
+    ('هيونداي', ['أكسنت', 'إلنترا'], 100),
+]
+COLORS = ['أبيض', 'أسود', 'فضي', 'رمادي', 'أزرق', 'أحمر', 'ذهبي', 'كحلي']
+FUELS = ['petrol'] * 14 + ['diesel'] * 3 + ['hybrid'] * 2 + ['electric']
+TRANSMISSIONS = ['auto'] * 6 + ['manual']
+DESCRIPTIONS = [
+    'سيارة نظيفة ومريحة للرحلات الطويلة',
+    'مناسبة للعائلات مع مساحة واسعة',
+    'اقتصادية في استهلاك الوقود',
+    'Well maintained, ideal for city driving',
+    'Spacious and comfortable for long trips',
+]
+FIRST_NAMES = ['Mohammed', 'Ahmed', 'Sara', 'Fatimah', 'Omar', 'Noura', 'Khalid', 'Layla', 'Abdullah', 'Reem']
+LAST_NAMES = ['Alqahtani', 'Alharbi', 'Alotaibi', 'Alghamdi', 'Alzahrani', 'Alshehri', 'Aldosari']
+LOCATIONS = ['Main Office', 'King Khalid Airport', 'Olaya Street', 'King Abdulaziz Airport', 'Corniche Road']
+RATINGS = [1] * 3 + [2] * 5 + [3] * 15 + [4] * 37 + [5] * 40
+
+BOOKING_COLUMNS = (
+    'user_id', 'car_id', 'start_date', 'end_date', 'pickup_location', 'dropoff_location',
+    'status', 'duration_days', 'daily_rate', 'total_price', 'created_at', 'updated_at',
+)
+PAID_STATUSES = ('CONFIRMED', 'ACTIVE', 'COMPLETED')
+
+
+def _adapter(field):
+    # التواريخ تُولَّد بتوقيت UTC بلا منطقة زمنية (كما يخزنها Django)، والأرقام Decimal تمرر كما هي
+    if isinstance(field, models.DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(field, models.DateField):
+        return connection.ops.adapt_datefield_value
+    return None
+
+
+def bulk_insert(model, columns, rows, batch_size=BATCH_SIZE, returning=False):
+    """
+    Insert ``rows`` (tuples of Python values in ``columns`` order, by attname;
+    datetimes naive in UTC) with multi-row INSERTs; the model's other fields
+    get their defaults.
+    Returns the new primary keys, in order, when ``returning``.
+    """
+    opts = model._meta
+    by_attname = {field.attname: field for field in opts.concrete_fields}
+    given = [by_attname[column] for column in columns]
+    rest = [field for field in opts.concrete_fields if field.attname not in columns and not field.primary_key]
+    defaults = [field.get_db_prep_save(field.get_default(), connection) for field in rest]
+    fields = given + rest
+    adapters = [(i, adapt) for i, adapt in enumerate(map(_adapter, given)) if adapt]
+
+    qn = connection.ops.quote_name
+    placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    per_statement = batch_size
+    if connection.features.max_query_params:
+        per_statement = min(per_statement, connection.features.max_query_params // len(fields))
+    head = 'INSERT INTO {} ({}) VALUES '.format(qn(opts.db_table), ', '.join(qn(field.column) for field in fields))
+    tail = f' RETURNING {qn(opts.pk.column)}' if returning else ''
+
+    ids = []
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), per_statement):
+            chunk = rows[offset:offset + per_statement]
+            params = []
+            for row in chunk:
+                row = list(row)
+                for i, adapt in adapters:
+                    row[i] = adapt(row[i])
+                params += row
+                params += defaults
+            cursor.execute(head + ', '.join([placeholder] * len(chunk)) + tail, params)
+            if returning:
+                ids += [pk for pk, in cursor.fetchall()]
+    return ids
+
+
+class DatasetGenerator:
+
+    def __init__(self, companies=20, cars=1000, users=5000, bookings=50000, review_rate=0.3,
+                 seed=0, anchor=None, history_days=365, future_days=60, prefix='gen', batch_size=BATCH_SIZE):
+        self.sizes = {'companies': companies, 'cars': cars, 'users': users, 'bookings': bookings}
+        self.review_rate = review_rate
+        self.rng = random.Random(seed)
+        anchor = anchor or timezone.localdate()
+        # منتصف نهار يوم المرجع، UTC بلا منطقة زمنية
+        self.now = datetime.combine(anchor, datetime.min.time()) + timedelta(hours=12)
+        self.history = timedelta(days=history_days)
+        self.future = timedelta(days=future_days)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def _insert(self, model, columns, rows, returning=False):
+        ids = bulk_insert(model, columns, rows, self.batch_size, returning)
+        label = model._meta.model_name
+        self.counts[label] = self.counts.get(label, 0) + len(rows)
+        return ids
+
+    def companies(self):
+        names = [f'{self.prefix} Rentals {i + 1}' for i in range(self.sizes['companies'])]
+        ids = self._insert(RentalCompany, ('name', 'name_key'), [(name, normalize_text(name)) for name in names], True)
+        return list(zip(ids, names))
+
+    def cars(self, companies):
+        """Insert the cars; returns ``[(car_id, daily_price)]``."""
+        rng = self.rng
+        documents, keys = {}, {}
+        rows, prices = [], []
+        for i in range(self.sizes['cars']):
+            company_id, company_name = companies[i % len(companies)]
+            brand, model_names, base_price = rng.choice(CATALOG)
+            model_name = rng.choice(model_names)
+            color = rng.choice(COLORS)
+            description = rng.choice(DESCRIPTIONS)
+            document = (brand, model_name, company_name, color, description)
+            if document not in documents:
+                documents[document] = build_search_document(*document)
+            for value in (brand, model_name):
+                if value not in keys:
+                    keys[value] = normalize_text(value)
+            price = Decimal(base_price + rng.randrange(0, base_price, 5))
+            prices.append(price)
+            created_at = self.now - self.history - timedelta(days=rng.randrange(365))
+            rows.append((
+                company_id, brand, model_name, description, rng.choice(TRANSMISSIONS), rng.choice(FUELS), color,
+                f'{self.prefix.upper()[:6]} {i + 1:07d}', price, created_at, created_at,
+                documents[document], keys[brand], keys[model_name],
+            ))
+        columns = (
+            'rental_company_id', 'brand', 'model_name', 'description', 'transmission', 'fuel_type', 'color',
+            'plate_number', 'daily_price', 'created_at', 'updated_at', 'search_document', 'brand_key', 'model_key',
+        )
+        return list(zip(self._insert(Car, columns, rows, True), prices))
+
+    def users(self):
+        """Insert the users and their profiles; returns the user ids."""
+        rng = self.rng
+        rows, joined = [], []
+        for i in range(self.sizes['users']):
+            date_joined = self.now - self.history - timedelta(days=rng.randrange(730))
+            joined.append(date_joined)
+            username = f'{self.prefix}_user{i + 1}'
+            rows.append((
+                username, f'{username}@example.com', rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                UNUSABLE_PASSWORD_PREFIX, date_joined, False, False, True,
+            ))
+        columns = ('username', 'email', 'first_name', 'last_name', 'password', 'date_joined',
+                   'is_superuser', 'is_staff', 'is_active')
+        ids = self._insert(User, columns, rows, True)
+
+        profiles = [
+            (user_id, f'+9665{rng.randrange(10 ** 8):08d}',
+             (date_joined - timedelta(days=rng.randrange(18 * 365, 65 * 365))).date(), date_joined, date_joined)
+            for user_id, date_joined in zip(ids, joined)
+        ]
+        self._insert(UserProfile, ('user_id', 'phone_number', 'date_of_birth', 'created_at', 'updated_at'), profiles)
+        return ids
+
+    def _booking(self, car_id, price, user_id, start, end, status):
+        rng = self.rng
+        duration = max(1, (end - start).days + 1)
+        created = min(start - timedelta(hours=rng.randrange(1, 24 * 30)), self.now - timedelta(hours=rng.randrange(1, 48)))
+        updated = min(end, self.now) if status == 'COMPLETED' else created
+        return (
+            user_id, car_id, start, end, rng.choice(LOCATIONS), rng.choice(LOCATIONS),
+            status, duration, price, price * duration, created, updated,
+        )
+
+    def car_bookings(self, car_id, price, count, user_ids):
+        """``count`` booking rows on one car's timeline; blocking ones never overlap."""
+        rng = self.rng
+        slot = (self.history + self.future) / max(count, 1)
+        t = self.now - self.history
+        rows = []
+        while len(rows) < count:
+            length = max(timedelta(hours=4), slot * rng.uniform(0.4, 0.9))
+            start = t + (slot - length) * rng.random()
+            end = start + length
+            t += slot
+
+            if end <= self.now:
+                status = 'CANCELLED' if rng.random() < 0.12 else 'COMPLETED'
+            elif start <= self.now:
+                status = 'ACTIVE'
+            else:
+                status = 'PENDING' if rng.random() < 0.3 else 'CONFIRMED'
+            rows.append(self._booking(car_id, price, rng.choice(user_ids), start, end, status))
+
+            if len(rows) < count and rng.random() < 0.15:
+                # طلب منافس على نفس الفترة تقريباً: معلق إن كان في المستقبل، وإلا ملغي
+                shift = timedelta(hours=rng.randrange(-12, 13))
+                competing = 'PENDING' if start + shift > self.now else 'CANCELLED'
+                rows.append(self._booking(car_id, price, rng.choice(user_ids), start + shift, end + shift, competing))
+        return rows
+
+    def _flush_bookings(self, rows, reviewed):
+        rng = self.rng
+        ids = self._insert(Booking, BOOKING_COLUMNS, rows, True)
+        payments, reviews = [], []
+        for booking_id, (user_id, car_id, _, end, _, _, status, _, _, total, created, _) in zip(ids, rows):
+            if status not in PAID_STATUSES:
+                continue
+            paid_at = created + timedelta(minutes=rng.randrange(1, 60))
+            payments.append((booking_id, f'{self.prefix}-{booking_id}', total, 'COMPLETED', paid_at, paid_at))
+            if status == 'COMPLETED' and (car_id, user_id) not in reviewed and rng.random() < self.review_rate:
+                reviewed.add((car_id, user_id))
+                comment = '' if rng.random() < 0.5 else rng.choice(DESCRIPTIONS)
+                reviewed_at = end + timedelta(hours=rng.randrange(1, 72))
+                reviews.append((car_id, user_id, rng.choice(RATINGS), comment, reviewed_at, reviewed_at))
+        self._insert(
+            RentalPayment, ('rental_booking_id', 'transaction_id', 'amount', 'status', 'created_at', 'updated_at'),
+            payments,
+        )
+        self._insert(CarReview, ('car_id', 'user_id', 'rating', 'comment', 'created_at', 'updated_at'), reviews)
+        rows.clear()
+
+    def bookings(self, cars, user_ids):
+        per_car, extra = divmod(self.sizes['bookings'], len(cars))
+        rows, reviewed = [], set()
+        for i, (car_id, price) in enumerate(cars):
+            rows += self.car_bookings(car_id, price, per_car + (i < extra), user_ids)
+            if len(rows) >= self.batch_size:
+                self._flush_bookings(rows, reviewed)
+        if rows:
+            self._flush_bookings(rows, reviewed)
+
+    def run(self):
+        """Insert the whole dataset; returns ``(counts, seconds)``."""
+        started = time.perf_counter()
+        with transaction.atomic():
+            companies = self.companies()
+            cars = self.cars(companies) if companies else []
+            user_ids = self.users()
+            if cars and user_ids:
+                self.bookings(cars, user_ids)
+        return self.counts, time.perf_counter() - started
+
+
+def generate(**options):
+    """
+    Generate a dataset (options as DatasetGenerator), then rebuild the
+    rating aggregates and daily rollups. Returns ``(counts, insert_seconds)``.
+    """
+    counts, seconds = DatasetGenerator(**options).run()
+    rebuild_ratings()
+    rebuild_rollups()
+    return counts, seconds
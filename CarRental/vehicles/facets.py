@@ -0,0 +1,117 @@
+"""
+Facet counts for the catalog filters.
+
+One grouped query returns a row per (transmission, fuel, company, price
+bucket) combination for the current search; every facet's counts are then
+summed from those rows in Python. Each facet ignores its own selection but
+honours the others, so picking "diesel" still shows how many cars exist for
+the other fuel types. Rows are cached per search signature and the whole
+cache is dropped (by bumping its version, kept in the database so that every
+process sees it, see main/versions.py) whenever a Car changes.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Value, When
+
+from main.versions import bump, get_version
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+_VERSION_NAME = 'car_facets'
+
+# (المفتاح، الحد الأدنى، الحد الأعلى) — الحد الأعلى غير مشمول
+PRICE_BUCKETS = [
+    ('0-199', 0, 200),
+    ('200-499', 200, 500),
+    ('500-999', 500, 1000),
+    ('1000+', 1000, None),
+]
+
+def invalidate_facets():
+    bump(_VERSION_NAME)
+
+
+def _price_bucket():
+    whens = [
+        When(daily_price__lt=high, then=Value(key))
+        for key, low, high in PRICE_BUCKETS if high is not None
+    ]
+    return Case(*whens, default=Value(PRICE_BUCKETS[-1][0]), output_field=CharField())
+
+
+def price_bucket_filter(key):
+    for bucket, low, high in PRICE_BUCKETS:
+        if bucket == key:
+            lookups = {'daily_price__gte': low}
+            if high is not None:
+                lookups['daily_price__lt'] = high
+            return lookups
+    return None
+
+
+def apply_facet_filters(queryset, selected):
+    if selected.get('transmission'):
+        queryset = queryset.filter(transmission=selected['transmission'])
+    if selected.get('fuel'):
+        queryset = queryset.filter(fuel_type=selected['fuel'])
+    if selected.get('company'):
+        queryset = queryset.filter(rental_company_id=selected['company'])
+    if selected.get('price'):
+        queryset = queryset.filter(**price_bucket_filter(selected['price']))
+    return queryset
+
+
+def _query_rows(queryset):
+    grouped = (
+        queryset.order_by()
+        .annotate(price_bucket=_price_bucket())
+        .values('transmission', 'fuel_type', 'rental_company_id', 'rental_company__name', 'price_bucket')
+        .annotate(n=Count('id'))
+    )
+    return [
+        (r['transmission'], r['fuel_type'], r['rental_company_id'], r['rental_company__name'],
+         r['price_bucket'], r['n'])
+        for r in grouped
+    ]
+
+
+def _grouped_rows(queryset, signature):
+    if signature is None:
+        return _query_rows(queryset)
+
+    version = get_version(_VERSION_NAME)
+    digest = hashlib.md5(repr(signature).encode()).hexdigest()
+    key = f'car_facets:{version}:{digest}'
+
+    rows = cache.get(key)
+    if rows is None:
+        rows = _query_rows(queryset)
+        cache.set(key, rows, FACETS_CACHE_TIMEOUT)
+    return rows
+
+
+def facet_counts(queryset, signature, selected):
+    """
+    Return ``{'transmission': {...}, 'fuel': {...}, 'company': {...},
+    'price': {...}}`` for ``queryset`` (the search results before any facet
+    filter). ``signature`` must identify everything that shaped
+    ``queryset``, or be None to skip the cache (for results that depend on
+    data that does not invalidate it, such as bookings); ``selected`` maps
+    facet name to the chosen value or None.
+    """
+    rows = _grouped_rows(queryset, signature)
+    columns = {'transmission': 0, 'fuel': 1, 'company': 2, 'price': 4}
+    wanted = {name: value for name, value in selected.items() if value}
+
+    counts = {name: {} for name in columns}
+    company_names = {}
+    for row in rows:
+        company_names[row[2]] = row[3]
+        for name, column in columns.items():
+            # الفلتر الخاص بهذا التصنيف لا يُطبق على عداده
+            if all(str(row[columns[other]]) == str(value)
+                   for other, value in wanted.items() if other != name):
+                counts[name][row[column]] = counts[name].get(row[column], 0) + row[5]
+
+    counts['company_names'] = company_names
+    return counts
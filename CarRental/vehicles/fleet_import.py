@@ -0,0 +1,228 @@
+"""
+Bulk import of a company's fleet from a CSV or JSON Lines file.
+
+The file is read one row at a time and handled in chunks of ``chunk_size``
+rows, so memory stays flat whatever its size. Each row is validated with
+``CarImportForm`` (``CarForm``'s fields and rules, minus the image) and
+upserted by ``plate_number``: a plate already in the database updates that
+car, a new plate creates one. The rental company is given by name (or id)
+in the ``rental_company`` column, or for the whole file by ``company`` (a
+RentalCompany, used for the rows that leave the column out or empty).
+
+A row that updates an existing car only needs the plate and the columns that
+change; the other fields (and empty cells) keep their current values. Valid rows of a chunk
+are written together (``bulk_create``/``bulk_update``) in one transaction;
+invalid rows are skipped and reported with their line number and errors.
+
+Bulk writes skip ``Car.save`` and the post_save signal, so the search fields
+are filled here (``Car.refresh_search_fields``), ``updated_at`` is set on the
+updated cars, and the facet counts are invalidated once at the end.
+"""
+import copy
+import csv
+import json
+import os
+from collections import namedtuple
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .facets import invalidate_facets
+from .forms import CarForm
+from .models import Car, RentalCompany
+from .normalization import normalize_text
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 500
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# قيم is_available المقبولة في ملفات CSV
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'نعم'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'لا'}
+
+RowError = namedtuple('RowError', 'line plate_number errors')
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + len(self.errors)
+
+
+class CompanyLookupField(forms.ModelChoiceField):
+    """Rental company by name (exact or normalized) or id, from a preloaded map."""
+
+    def __init__(self, companies, **kwargs):
+        super().__init__(RentalCompany.objects.none(), **kwargs)
+        self.companies = companies
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        value = str(value).strip()
+        company = self.companies.get(value) or self.companies.get(normalize_text(value))
+        if company is None:
+            raise ValidationError(f'شركة التأجير "{value}" غير موجودة.', code='invalid_choice')
+        return company
+
+
+class _SharedFields(dict):
+    # التحقق لا يعدّل الحقول، فتُشارك بين نماذج كل الصفوف بدل نسخها لكل صف
+    def __deepcopy__(self, memo):
+        return self
+
+
+class CarImportForm(CarForm):
+
+    class Meta(CarForm.Meta):
+        fields = [name for name in CarForm.Meta.fields if name != 'image']
+        widgets = {}
+
+    def _get_validation_exclusions(self):
+        # الشركة تحققت منها CompanyLookupField، بدون استعلام لكل صف
+        return super()._get_validation_exclusions() | {'rental_company'}
+
+    def validate_unique(self):
+        # رقم اللوحة هو مفتاح الاستيراد: اللوحة الموجودة تُحدَّث ولا تُرفض
+        pass
+
+
+def import_form(companies):
+    """CarImportForm resolving companies from ``companies``, with fields shared by all its forms."""
+    form_class = type('CarImportForm', (CarImportForm,), {})
+    # بعد إنشاء الصنف: الـ metaclass يعيد بناء base_fields من Meta
+    form_class.base_fields = _SharedFields(CarImportForm.base_fields, rental_company=CompanyLookupField(companies))
+    return form_class
+
+
+IMPORT_FIELDS = CarImportForm._meta.fields
+UPDATE_FIELDS = [name for name in IMPORT_FIELDS if name != 'plate_number'] + [
+    'search_document', 'brand_key', 'model_key',
+]
+_UPDATE_ATTNAMES = [Car._meta.get_field(name).attname for name in UPDATE_FIELDS]
+# القيم الافتراضية للسيارة الجديدة عندما يغيب العمود من الملف
+NEW_CAR_DEFAULTS = {
+    field.name: field.get_default() for field in Car._meta.concrete_fields
+    if field.name in IMPORT_FIELDS and field.has_default() and field.name != 'plate_number'
+}
+
+
+def detect_format(filename):
+    return FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def iter_rows(fh, fmt):
+    """``(line, row, problem)`` for each record of a text stream; ``row`` is None when unreadable."""
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for row in reader:
+            # الأعمدة الزائدة عن العناوين تأتي تحت المفتاح None
+            row.pop(None, None)
+            yield reader.line_num, row, None
+        return
+
+    for line, text in enumerate(fh, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            yield line, None, f'JSON غير صالح: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield line, None, 'كل سطر يجب أن يكون كائن JSON.'
+            continue
+        yield line, row, None
+
+
+def load_companies():
+    companies = {}
+    for company in RentalCompany.objects.all():
+        companies[str(company.pk)] = company
+        companies[company.name_key] = company
+        companies[company.name] = company
+    return companies
+
+
+def _form_data(row, car, company):
+    data = model_to_dict(car, fields=IMPORT_FIELDS) if car is not None else dict(NEW_CAR_DEFAULTS)
+    if company is not None:
+        data['rental_company'] = company.pk
+    # الخلية الفارغة تُبقي القيمة الحالية (أو الافتراضية للسيارة الجديدة)
+    data.update((name, value) for name, value in row.items() if name in IMPORT_FIELDS and value not in ('', None))
+
+    available = data.get('is_available')
+    if isinstance(available, str) and available.strip().lower() in TRUE_VALUES | FALSE_VALUES:
+        data['is_available'] = available.strip().lower() in TRUE_VALUES
+    return data
+
+
+def _snapshot(car):
+    return tuple(getattr(car, attname) for attname in _UPDATE_ATTNAMES)
+
+
+def import_chunk(chunk, form_class, report, company=None, batch_size=BATCH_SIZE):
+    """Validate and upsert one chunk of ``(line, row, problem)``; updates ``report``."""
+    plates = {str(row.get('plate_number') or '').strip() for _, row, _ in chunk if row}
+    cars = {car.plate_number: car for car in Car.objects.filter(plate_number__in=plates)}
+    originals = {plate: _snapshot(car) for plate, car in cars.items()}
+    pending = {}
+
+    for line, row, problem in chunk:
+        if problem:
+            report.errors.append(RowError(line, '', {'__all__': [problem]}))
+            continue
+        plate = str(row.get('plate_number') or '').strip()
+        car = cars.get(plate)
+        # نسخة حتى لا يعدّل صف غير صالح السيارة نفسها
+        form = form_class(_form_data(row, car, company), instance=copy.copy(car) if car else None)
+        if not form.is_valid():
+            errors = {name: list(messages) for name, messages in form.errors.items()}
+            report.errors.append(RowError(line, plate, errors))
+            continue
+        car = form.save(commit=False)
+        car.refresh_search_fields()
+        cars[car.plate_number] = pending[car.plate_number] = car
+
+    created = [car for car in pending.values() if car.pk is None]
+    updated = [car for plate, car in pending.items() if car.pk is not None and _snapshot(car) != originals[plate]]
+    # bulk_update لا يطبق auto_now
+    now = timezone.now()
+    for car in updated:
+        car.updated_at = now
+    with transaction.atomic():
+        Car.objects.bulk_create(created, batch_size=batch_size)
+        Car.objects.bulk_update(updated, [*UPDATE_FIELDS, 'updated_at'], batch_size=batch_size)
+    report.created += len(created)
+    report.updated += len(updated)
+    report.unchanged += len(pending) - len(created) - len(updated)
+
+
+def import_fleet(fh, fmt, company=None, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+    """Import every row of the text stream ``fh`` (``'csv'`` or ``'jsonl'``); returns an ImportReport."""
+    form_class = import_form(load_companies())
+    report = ImportReport()
+    chunk = []
+    try:
+        for record in iter_rows(fh, fmt):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                import_chunk(chunk, form_class, report, company, batch_size)
+                chunk = []
+        if chunk:
+            import_chunk(chunk, form_class, report, company, batch_size)
+    finally:
+        if report.created or report.updated:
+            invalidate_facets()
+    return report
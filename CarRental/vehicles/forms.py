@@ -41,4 +41,18 @@ class CarReviewForm(forms.ModelForm):
                 attrs={'class': 'form-select'}
             ),
             'comment': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'أضف تعليقك هنا...'}),
-        }
\ No newline at end of file
+        }
+
+class FleetImportForm(forms.Form):
+    file = forms.FileField(
+        label='ملف الأسطول',
+        help_text='CSV أو JSON Lines، بأعمدة حقول السيارة، ورقم اللوحة مفتاح التحديث',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.jsonl,.ndjson'}),
+    )
+    rental_company = forms.ModelChoiceField(
+        queryset=RentalCompany.objects.order_by('name'),
+        required=False,
+        label='شركة التأجير',
+        help_text='للصفوف التي لا تحدد الشركة',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils.dateparse import parse_date
+
+from vehicles.datasets import BATCH_SIZE, generate
+
+
+class Command(BaseCommand):
+    help = 'توليد بيانات تجريبية ثابتة (بنفس البذرة) بأي حجم: شركات وسيارات ومستخدمون وحجوزات وتقييمات ومدفوعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=20, help='عدد شركات التأجير')
+        parser.add_argument('--cars', type=int, default=1000, help='عدد السيارات')
+        parser.add_argument('--users', type=int, default=5000, help='عدد العملاء (مع ملفاتهم الشخصية)')
+        parser.add_argument('--bookings', type=int, default=50000, help='عدد الحجوزات')
+        parser.add_argument('--review-rate', type=float, default=0.3, help='نسبة الحجوزات المكتملة التي يُكتب لها تقييم')
+        parser.add_argument('--seed', type=int, default=0, help='بذرة التوليد العشوائي')
+        parser.add_argument('--anchor', help='تاريخ "اليوم" للبيانات (YYYY-MM-DD)، الافتراضي اليوم')
+        parser.add_argument('--history-days', type=int, default=365, help='عدد الأيام الماضية التي تغطيها الحجوزات')
+        parser.add_argument('--future-days', type=int, default=60, help='عدد الأيام القادمة التي تغطيها الحجوزات')
+        parser.add_argument('--prefix', default='gen', help='بادئة الأسماء وأرقام اللوحات (لتوليد أكثر من مجموعة في نفس القاعدة)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='عدد الصفوف في كل bulk_create')
+
+    def handle(self, *args, **options):
+        anchor = None
+        if options['anchor']:
+            anchor = parse_date(options['anchor'])
+            if anchor is None:
+                raise CommandError('--anchor يجب أن يكون بصيغة YYYY-MM-DD.')
+        sizes = ('companies', 'cars', 'users', 'bookings', 'batch_size')
+        if any(options[name] < 0 for name in sizes) or options['batch_size'] == 0:
+            raise CommandError('الأحجام يجب ألا تكون سالبة، و --batch-size أكبر من صفر.')
+
+        try:
+            counts, seconds = generate(
+                companies=options['companies'], cars=options['cars'], users=options['users'],
+                bookings=options['bookings'], review_rate=options['review_rate'], seed=options['seed'],
+                anchor=anchor, history_days=options['history_days'], future_days=options['future_days'],
+                prefix=options['prefix'], batch_size=options['batch_size'],
+            )
+        except IntegrityError as exc:
+            raise CommandError(f'توجد بيانات بنفس البادئة "{options["prefix"]}"، استخدم --prefix آخر. ({exc})')
+
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        rows = sum(counts.values())
+        rate = rows / seconds if seconds else 0
+        self.stdout.write(self.style.SUCCESS(f'تم إدراج {rows} صف في {seconds:.1f} ثانية ({rate:,.0f} صف/ثانية).'))
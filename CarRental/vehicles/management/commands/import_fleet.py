@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from vehicles.fleet_import import BATCH_SIZE, CHUNK_SIZE, detect_format, import_fleet
+from vehicles.models import RentalCompany
+from vehicles.normalization import normalize_text
+
+
+class Command(BaseCommand):
+    help = 'استيراد أو تحديث أسطول سيارات من ملف CSV أو JSON Lines (حسب رقم اللوحة)، مع تقرير بأخطاء كل صف'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='مسار الملف، أو - للقراءة من stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='صيغة الملف، الافتراضي حسب الامتداد')
+        parser.add_argument('--company', help='اسم شركة التأجير للصفوف التي لا تحدد الشركة')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='عدد الصفوف التي يُتحقق منها وتُحفظ معاً')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='عدد السيارات في كل bulk_create/bulk_update')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (None if path == '-' else detect_format(path))
+        if fmt is None:
+            raise CommandError('تعذر معرفة صيغة الملف من امتداده، استخدم --format.')
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size و --batch-size يجب أن يكونا أكبر من صفر.')
+
+        company = None
+        if options['company']:
+            name = options['company']
+            company = RentalCompany.objects.filter(Q(name=name) | Q(name_key=normalize_text(name))).first()
+            if company is None:
+                raise CommandError(f'شركة التأجير "{name}" غير موجودة.')
+
+        try:
+            fh = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as exc:
+            raise CommandError(f'تعذر فتح الملف: {exc}')
+        try:
+            report = import_fleet(
+                fh, fmt, company=company, chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+            )
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+        for error in report.errors:
+            messages = '; '.join(
+                f'{field}: {" ".join(field_errors)}' if field != '__all__' else ' '.join(field_errors)
+                for field, field_errors in error.errors.items()
+            )
+            self.stderr.write(f'سطر {error.line} ({error.plate_number or "-"}): {messages}')
+
+        summary = (f'{report.rows} صف: {report.created} جديدة، {report.updated} محدّثة، '
+                   f'{report.unchanged} بدون تغيير، {len(report.errors)} مرفوضة.')
+        self.stdout.write(self.style.WARNING(summary) if report.errors else self.style.SUCCESS(summary))
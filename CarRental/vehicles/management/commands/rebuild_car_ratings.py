@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب عدد ومتوسط التقييمات لكل السيارات من جدول التقييمات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'تم تحديث تقييمات {updated} سيارة.'))
@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from vehicles.models import Car
-import random
+from vehicles.models import Car, RentalCompany
 
 class Command(BaseCommand):
     help = 'تعبئة قاعدة البيانات ببيانات سيارات وهمية للتجربة'
@@ -9,8 +8,8 @@ class Command(BaseCommand):
         # قائمة بسيارات متنوعة لإضافتها
         cars_data = [
             {
-                "name": "تويوتا كامري",
-                "model_year": 2023,
+                "brand": "تويوتا",
+                "model_name": "كامري 2023",
                 "plate_number": "ABC 1234",
                 "color": "أبيض لؤلؤي",
                 "daily_price": 200,
@@ -18,8 +17,8 @@ class Command(BaseCommand):
                 "fuel_type": "petrol",
             },
             {
-                "name": "هيونداي أكسنت",
-                "model_year": 2022,
+                "brand": "هيونداي",
+                "model_name": "أكسنت 2022",
                 "plate_number": "KSA 5555",
                 "color": "فضي",
                 "daily_price": 120,
@@ -27,8 +26,8 @@ class Command(BaseCommand):
                 "fuel_type": "petrol",
             },
             {
-                "name": "فورد تورس",
-                "model_year": 2024,
+                "brand": "فورد",
+                "model_name": "تورس 2024",
                 "plate_number": "XYZ 9876",
                 "color": "أسود ملكي",
                 "daily_price": 350,
@@ -36,8 +35,8 @@ class Command(BaseCommand):
                 "fuel_type": "petrol",
             },
             {
-                "name": "لوسيد آير",
-                "model_year": 2025,
+                "brand": "لوسيد",
+                "model_name": "آير 2025",
                 "plate_number": "ELEC 2030",
                 "color": "ذهبي",
                 "daily_price": 1500,
@@ -45,8 +44,8 @@ class Command(BaseCommand):
                 "fuel_type": "electric",
             },
             {
-                "name": "جمس يوكن",
-                "model_year": 2021,
+                "brand": "جمس",
+                "model_name": "يوكن 2021",
                 "plate_number": "GMC 1000",
                 "color": "كحلي",
                 "daily_price": 600,
@@ -54,8 +53,8 @@ class Command(BaseCommand):
                 "fuel_type": "petrol",
             },
             {
-                "name": "تويوتا هايلكس",
-                "model_year": 2023,
+                "brand": "تويوتا",
+                "model_name": "هايلكس 2023",
                 "plate_number": "HLX 4444",
                 "color": "أبيض",
                 "daily_price": 250,
@@ -66,16 +65,19 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.WARNING('جاري إضافة السيارات...'))
 
+        # كل سيارة تتبع شركة تأجير
+        company, _ = RentalCompany.objects.get_or_create(name='شركة تجريبية')
+
         for data in cars_data:
             # نستخدم get_or_create لتجنب تكرار البيانات إذا شغلت الأمر مرتين
             car, created = Car.objects.get_or_create(
                 plate_number=data['plate_number'],
-                defaults=data
+                defaults={**data, 'rental_company': company, 'description': f"{data['brand']} {data['model_name']}"}
             )
             
             if created:
-                self.stdout.write(self.style.SUCCESS(f'✅ تمت إضافة: {car.name}'))
+                self.stdout.write(self.style.SUCCESS(f'✅ تمت إضافة: {car}'))
             else:
-                self.stdout.write(f'⚠️ موجودة مسبقاً: {car.name}')
+                self.stdout.write(f'⚠️ موجودة مسبقاً: {car}')
 
         self.stdout.write(self.style.SUCCESS('\nتم الانتهاء بنجاح! قاعدة البيانات جاهزة الآن.'))
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+from vehicles.search import FTS_TABLE, SEARCH_CONFIG, build_search_document, install_sqlite_fts
+
+
+def populate_search_document(apps, schema_editor):
+    Car = apps.get_model('vehicles', 'Car')
+    cars = list(Car.objects.select_related('rental_company'))
+    for car in cars:
+        car.search_document = build_search_document(
+            car.brand, car.model_name, car.rental_company.name, car.color, car.description
+        )
+    Car.objects.bulk_update(cars, ['search_document'], batch_size=500)
+
+
+def _postgres_indexes():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return [
+        GinIndex(SearchVector('search_document', config=SEARCH_CONFIG), name='car_search_fts_gin'),
+        GinIndex(fields=['search_document'], opclasses=['gin_trgm_ops'], name='car_search_trgm_gin'),
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    Car = apps.get_model('vehicles', 'Car')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in _postgres_indexes():
+            schema_editor.add_index(Car, index)
+    elif vendor == 'sqlite':
+        install_sqlite_fts(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    Car = apps.get_model('vehicles', 'Car')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for index in _postgres_indexes():
+            schema_editor.remove_index(Car, index)
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_rentalcompany_car_rental_company_carreview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+from vehicles.normalization import normalize_text
+from vehicles.search import build_search_document, install_sqlite_fts
+
+
+def populate_search_keys(apps, schema_editor):
+    RentalCompany = apps.get_model('vehicles', 'RentalCompany')
+    Car = apps.get_model('vehicles', 'Car')
+
+    companies = list(RentalCompany.objects.all())
+    for company in companies:
+        company.name_key = normalize_text(company.name)
+    RentalCompany.objects.bulk_update(companies, ['name_key'], batch_size=500)
+
+    cars = list(Car.objects.select_related('rental_company'))
+    for car in cars:
+        car.brand_key = normalize_text(car.brand)
+        car.model_key = normalize_text(car.model_name)
+        car.search_document = build_search_document(
+            car.brand, car.model_name, car.rental_company.name, car.color, car.description
+        )
+    Car.objects.bulk_update(cars, ['brand_key', 'model_key', 'search_document'], batch_size=500)
+
+
+def reinstall_sqlite_fts(apps, schema_editor):
+    # إضافة الأعمدة في SQLite تعيد إنشاء الجدول وتحذف مشغّلات FTS5
+    if schema_editor.connection.vendor == 'sqlite':
+        install_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_car_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='brand_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='model_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='rentalcompany',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(reinstall_sqlite_fts, migrations.RunPython.noop),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:43
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+from vehicles.search import install_sqlite_fts
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Car = apps.get_model('vehicles', 'Car')
+    CarReview = apps.get_model('vehicles', 'CarReview')
+
+    stats = CarReview.objects.values('car_id').annotate(n=Count('id'), s=Sum('rating'))
+    cars = []
+    for row in stats:
+        cars.append(Car(
+            pk=row['car_id'], review_count=row['n'], rating_sum=row['s'],
+            rating_avg=row['s'] / row['n'],
+        ))
+    Car.objects.bulk_update(cars, ['review_count', 'rating_sum', 'rating_avg'], batch_size=500)
+
+
+def reinstall_sqlite_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        install_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0006_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, verbose_name='متوسط التقييم'),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد التقييمات'),
+        ),
+        migrations.RunPython(reinstall_sqlite_fts, migrations.RunPython.noop),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0007_car_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-created_at', '-id'], name='car_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['daily_price', 'id'], name='car_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-rating_avg', '-id'], name='car_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carreview',
+            index=models.Index(fields=['car', '-created_at', '-id'], name='review_car_created_idx'),
+        ),
+    ]
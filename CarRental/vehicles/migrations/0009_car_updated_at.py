@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:55
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Car = apps.get_model('vehicles', 'Car')
+    # السيارات الحالية تبدأ بتاريخ إنشائها، فعلامة التصدير القديمة (على created_at) تبقى صحيحة
+    Car.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
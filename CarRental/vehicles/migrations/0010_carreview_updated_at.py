@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    CarReview = apps.get_model('vehicles', 'CarReview')
+    # التقييمات الحالية تبدأ بتاريخ إنشائها، فعلامة التصدير القديمة (على created_at) تبقى صحيحة
+    CarReview.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0009_car_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carreview',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,36 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .normalization import normalize_text
+from .search import SEARCH_FIELDS, build_search_document
 
 class RentalCompany(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name="اسم شركة التأجير")
+
+    # الاسم بعد توحيد الهمزات والتاء المربوطة وحذف التشكيل (للبحث)
+    name_key = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        old_name = None
+        if self.pk:
+            old_name = RentalCompany.objects.filter(pk=self.pk).values_list('name', flat=True).first()
+        self.name_key = normalize_text(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
+
+        # اسم الشركة جزء من مستند البحث لكل سياراتها
+        if old_name is not None and old_name != self.name:
+            cars = list(self.cars.all())
+            for car in cars:
+                car.rental_company = self
+                car.search_document = car.build_search_document()
+            Car.objects.bulk_update(cars, ['search_document'], batch_size=500)
+
     class Meta:
         verbose_name = "شركة تأجير"
         verbose_name_plural = "شركات التأجير"
@@ -35,9 +58,50 @@ class Car(models.Model):
     image = models.ImageField(upload_to='cars/', blank=True, null=True, verbose_name="صورة السيارة")
     is_available = models.BooleanField(default=True, verbose_name="متاحة للإيجار؟")
     created_at = models.DateTimeField(auto_now_add=True)
+    # تُحدَّث مع كل تعديل، بما فيها تحديثات التقييمات والاستيراد (علامة التصدير، انظر bookings/exports.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # --- البحث النصي (يُبنى تلقائياً عند الحفظ، انظر vehicles/search.py) ---
+    search_document = models.TextField(blank=True, default='', editable=False)
+    brand_key = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
+    model_key = models.CharField(max_length=50, blank=True, default='', db_index=True, editable=False)
+
+    # --- ملخص التقييمات (يُحدَّث تلقائياً مع كل تقييم، انظر vehicles/ratings.py) ---
+    review_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="عدد التقييمات")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False, verbose_name="متوسط التقييم")
+
+    class Meta:
+        indexes = [
+            # خيارات الفرز في قائمة السيارات (انظر CAR_SORT_ORDERINGS) والصفحة الرئيسية
+            models.Index(fields=['-created_at', '-id'], name='car_created_idx'),
+            models.Index(fields=['daily_price', 'id'], name='car_price_idx'),
+            models.Index(fields=['-rating_avg', '-id'], name='car_rating_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model_name}"
+
+    def build_search_document(self):
+        return build_search_document(
+            self.brand, self.model_name, self.rental_company.name, self.color, self.description
+        )
+
+    def refresh_search_fields(self):
+        # تُستدعى أيضاً قبل bulk_create/bulk_update (انظر vehicles/fleet_import.py)
+        self.search_document = self.build_search_document()
+        self.brand_key = normalize_text(self.brand)
+        self.model_key = normalize_text(self.model_name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'updated_at'}
+            if update_fields & set(SEARCH_FIELDS):
+                update_fields |= {'search_document', 'brand_key', 'model_key'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
 class CarReview(models.Model):
     car = models.ForeignKey(
@@ -61,9 +125,15 @@ class CarReview(models.Model):
         verbose_name="التعليق"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # التقييم قابل للتعديل؛ علامة التصدير (انظر bookings/exports.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('car', 'user') 
         ordering = ['-created_at']
+        indexes = [
+            # صفحات تقييمات السيارة (created_at, id)
+            models.Index(fields=['car', '-created_at', '-id'], name='review_car_created_idx'),
+        ]
         verbose_name = "تقييم/تعليق سيارة"
         verbose_name_plural = "تقييمات/تعليقات السيارات"
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Arabic-aware text normalization for search keys.
+
+Users type hamza/alef variants, taa marbuta vs haa and diacritics
+inconsistently, so both the stored keys (``Car.brand_key``,
+``Car.model_key``, ``RentalCompany.name_key``, ``Car.search_document``) and
+the incoming query go through ``normalize_text`` before they are compared.
+"""
+import re
+
+# التشكيل + الألف الخنجرية + التطويل
+_DIACRITICS = re.compile('[ً-ٰٟـ]')
+
+_CHAR_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ی': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    'ک': 'ك',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+
+
+def normalize_text(value):
+    if not value:
+        return ''
+    value = _DIACRITICS.sub('', value).translate(_CHAR_MAP).casefold()
+    return ' '.join(value.split())
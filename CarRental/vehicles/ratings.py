@@ -0,0 +1,58 @@
+"""
+Denormalized review aggregates stored on Car (review_count, rating_sum,
+rating_avg).
+
+CarReview writes adjust them incrementally through signals (see
+signals.py); ``rebuild_ratings`` recomputes them from scratch for the
+``rebuild_car_ratings`` management command.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Car, CarReview
+
+
+def apply_rating_delta(car_id, count_delta, sum_delta):
+    """Shift one car's aggregates in a single UPDATE (no read-modify-write)."""
+    new_count = F('review_count') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+    Car.objects.filter(pk=car_id).update(
+        review_count=new_count,
+        rating_sum=new_sum,
+        # الطرف الأيمن في SET يرى القيم القديمة، لذلك نحسب المتوسط من القيم الجديدة صراحةً
+        rating_avg=Case(
+            When(review_count__lte=-count_delta, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def rebuild_ratings(batch_size=1000):
+    """Recompute every car's aggregates, ``batch_size`` cars per UPDATE."""
+    per_car = CarReview.objects.filter(car=OuterRef('pk')).order_by().values('car')
+    count_sq = Subquery(per_car.annotate(n=Count('id')).values('n'))
+    sum_sq = Subquery(per_car.annotate(s=Sum('rating')).values('s'))
+
+    last_id, updated = 0, 0
+    while True:
+        ids = list(
+            Car.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return updated
+        batch = Car.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+        with transaction.atomic():
+            batch.update(
+                review_count=Coalesce(count_sq, 0), rating_sum=Coalesce(sum_sq, 0), updated_at=timezone.now(),
+            )
+            batch.update(rating_avg=Case(
+                When(review_count=0, then=Value(0.0)),
+                default=Cast('rating_sum', FloatField()) / F('review_count'),
+                output_field=FloatField(),
+            ))
+        last_id = ids[-1]
+        updated += len(ids)
@@ -0,0 +1,145 @@
+"""
+Full-text search over the car catalog.
+
+Every Car keeps a normalized ``search_document`` (brand, model, company,
+color and description) that is rebuilt on save. On PostgreSQL it is matched through
+GIN indexes (tsvector + pg_trgm, see migration 0005); on SQLite through an
+FTS5 table kept in sync by triggers. Other backends fall back to a plain
+``icontains`` on the single document column.
+
+Short or partial queries are also matched by prefix against the indexed
+normalized keys (``brand_key``, ``model_key``, ``RentalCompany.name_key``).
+"""
+import re
+
+from django.db import connection
+from django.db.models import DecimalField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from .normalization import normalize_text
+
+SEARCH_CONFIG = 'simple'
+# درجة الصلة على PostgreSQL تُقرب إلى قيمة عشرية ثابتة حتى تعود من مؤشر الصفحة كما هي
+RANK_FIELD = DecimalField(max_digits=12, decimal_places=6)
+FTS_TABLE = 'vehicles_car_fts'
+
+# السيارة تعيد بناء مستند البحث عند تغيير أي من هذه الحقول
+SEARCH_FIELDS = ('brand', 'model_name', 'rental_company', 'color', 'description')
+
+SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        search_document, content='vehicles_car', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON vehicles_car BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON vehicles_car BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON vehicles_car BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+        INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+]
+
+
+def build_search_document(brand, model_name, company_name, color, description):
+    parts = (brand, model_name, company_name, color, description)
+    return ' '.join(normalize_text(p) for p in parts if p)
+
+
+def search_terms(query):
+    return re.findall(r'\w+', normalize_text(query))
+
+
+def install_sqlite_fts(schema_editor):
+    """
+    Create the FTS5 table and its triggers if missing.
+
+    SQLite migrations that alter ``vehicles_car`` rebuild the table and drop
+    its triggers, so this also runs after every ``migrate`` (see apps.py).
+    """
+    needs_rebuild = _count_triggers(schema_editor.connection) < 3
+    for sql in SQLITE_FTS_SQL:
+        schema_editor.execute(sql)
+    if needs_rebuild:
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _count_triggers(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{FTS_TABLE}_%'],
+        )
+        return cursor.fetchone()[0]
+
+
+def _key_prefix_match(query):
+    # استعلام بادئة على مفاتيح مفهرسة (LIKE 'x%') بدلاً من icontains
+    from .models import RentalCompany
+
+    companies = RentalCompany.objects.filter(name_key__startswith=query).values('id')
+    return (
+        Q(brand_key__startswith=query)
+        | Q(model_key__startswith=query)
+        | Q(rental_company_id__in=companies)
+    )
+
+
+def _postgres_search(queryset, terms, query):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    # نفس التعبير المستخدم في فهرس GIN حتى يستفيد منه المخطط
+    vector = SearchVector('search_document', config=SEARCH_CONFIG)
+    ts_query = SearchQuery(' & '.join(f"'{t}':*" for t in terms), config=SEARCH_CONFIG, search_type='raw')
+    return queryset.annotate(
+        search_vector=vector,
+        # float4 لا يعود كما هو بعد JSON، فتتكرر أو تُفقد صفوف عند حدود الصفحات
+        search_rank=Cast(SearchRank(vector, ts_query) + TrigramSimilarity('search_document', query), RANK_FIELD),
+    ).filter(
+        Q(search_vector=ts_query)
+        | Q(search_document__trigram_similar=query)
+        | _key_prefix_match(query)
+    )
+
+
+def _sqlite_search(queryset, terms, query):
+    match = ' '.join('"%s"*' % t.replace('"', '""') for t in terms)
+    table = queryset.model._meta.db_table
+    matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+    # bm25 أقل = أكثر صلة، لذلك نعكس الإشارة ليكون الترتيب تنازلياً
+    rank = RawSQL(
+        f'SELECT -rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+        (match,),
+        output_field=FloatField(),
+    )
+    return queryset.filter(Q(id__in=matched) | _key_prefix_match(query)).annotate(
+        search_rank=Coalesce(rank, 0.0)
+    )
+
+
+def search_cars(queryset, query):
+    """
+    Filter ``queryset`` down to cars matching ``query`` and annotate each row
+    with ``search_rank`` (higher is more relevant), a value that survives the
+    round trip through a pagination cursor exactly (``CarRental.pagination``).
+    """
+    query = normalize_text(query)
+    terms = search_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, terms, query)
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(queryset, terms, query)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_document__icontains=term)
+    return queryset.filter(condition | _key_prefix_match(query)).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
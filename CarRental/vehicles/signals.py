@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .facets import invalidate_facets
+from .models import Car, CarReview, RentalCompany
+from .ratings import apply_rating_delta
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=RentalCompany)
+@receiver(post_delete, sender=RentalCompany)
+def catalog_changed(sender, **kwargs):
+    invalidate_facets()
+
+
+@receiver(pre_save, sender=CarReview)
+def remember_old_rating(sender, instance, **kwargs):
+    # نحتاج القيم القديمة عند تعديل التقييم لحساب الفرق
+    instance._old_rating = None
+    if instance.pk:
+        instance._old_rating = (
+            CarReview.objects.filter(pk=instance.pk).values_list('car_id', 'rating').first()
+        )
+
+
+@receiver(post_save, sender=CarReview)
+def review_saved(sender, instance, created, **kwargs):
+    invalidate_facets()
+    old = getattr(instance, '_old_rating', None)
+    if created or old is None:
+        apply_rating_delta(instance.car_id, 1, instance.rating)
+        return
+
+    old_car_id, old_rating = old
+    if old_car_id != instance.car_id:
+        apply_rating_delta(old_car_id, -1, -old_rating)
+        apply_rating_delta(instance.car_id, 1, instance.rating)
+    elif old_rating != instance.rating:
+        apply_rating_delta(instance.car_id, 0, instance.rating - old_rating)
+
+
+@receiver(post_delete, sender=CarReview)
+def review_deleted(sender, instance, **kwargs):
+    invalidate_facets()
+    apply_rating_delta(instance.car_id, -1, -instance.rating)
@@ -1,3 +1,255 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking
+from CarRental.pagination import encode_cursor, paginate
+from CarRental.query_plans import QueryPlanTestCase, analyze
+
+from .facets import facet_counts
+from .fleet_import import import_fleet
+from .models import Car, CarReview, RentalCompany
+from .views import CAR_SORT_ORDERINGS
+
+
+class CarQueryPlanTests(QueryPlanTestCase):
+    """Car list sorting and review pages must read their indexes, not the whole table."""
+
+    CARS = 5000
+    REVIEWERS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Plan Rentals')
+        cls.cars = Car.objects.bulk_create([
+            Car(rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=80 + i % 900, plate_number=f'PLN {i}', rating_avg=i % 50 / 10)
+            for i in range(cls.CARS)
+        ], batch_size=1000)
+        users = User.objects.bulk_create([User(username=f'reviewer{i}') for i in range(cls.REVIEWERS)])
+        CarReview.objects.bulk_create([
+            CarReview(car=car, user=user, rating=4)
+            for car in cls.cars for user in users
+        ], batch_size=2000)
+        analyze()
+
+    def test_car_list_orderings(self):
+        for sort_by, ordering in CAR_SORT_ORDERINGS.items():
+            with self.subTest(sort_by=sort_by):
+                # على SQLite الجدول نفسه هو شجرة المفتاح الأساسي، فالمرور عليه بترتيب id ليس مسحاً كاملاً
+                allow_scans = ('vehicles_car',) if ordering == ('id',) else ()
+                self.assertIndexedPlan(Car.objects.order_by(*ordering)[:13], ordered=True, allow_scans=allow_scans)
+
+    def test_home_page_rows(self):
+        self.assertIndexedPlan(Car.objects.order_by('-created_at')[:4], ordered=True)
+        self.assertIndexedPlan(Car.objects.order_by('-daily_price')[:8], ordered=True)
+
+    def test_review_page(self):
+        reviews = CarReview.objects.filter(car=self.cars[0]).order_by('-created_at', '-id')[:11]
+        self.assertIndexedPlan(reviews, ordered=True)
+
+
+class FleetImportTests(TestCase):
+    """Fleet files are upserted by plate number, with one error entry per rejected row."""
+
+    HEADER = 'plate_number,rental_company,brand,model_name,description,daily_price,is_available\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = RentalCompany.objects.create(name='شركة الأمل')
+        cls.existing = Car.objects.create(
+            rental_company=cls.company, brand='Kia', model_name='Rio', description='-',
+            daily_price=90, plate_number='OLD 1', color='أحمر',
+        )
+
+    def test_csv_creates_updates_and_reports(self):
+        fh = io.StringIO(
+            self.HEADER
+            + 'NEW 1,شركة الامل,Toyota,Camry,sedan,120,1\n'
+            + 'OLD 1,,,,,95,0\n'
+            + 'BAD 1,nope,Toyota,Camry,sedan,abc,1\n'
+            + 'OLD 1,,,,,95,0\n'
+        )
+        updated_at = self.existing.updated_at
+        report = import_fleet(fh, 'csv', chunk_size=2)
+
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 1))
+        [error] = report.errors
+        self.assertEqual((error.line, error.plate_number), (4, 'BAD 1'))
+        self.assertEqual(set(error.errors), {'rental_company', 'daily_price'})
+
+        new = Car.objects.get(plate_number='NEW 1')
+        self.assertEqual(new.rental_company, self.company)
+        self.assertEqual(new.brand_key, 'toyota')
+        self.assertIn('camry', new.search_document)
+        self.existing.refresh_from_db()
+        # الأعمدة الفارغة تُبقي القيم الحالية
+        self.assertEqual((self.existing.daily_price, self.existing.is_available), (95, False))
+        self.assertEqual((self.existing.brand, self.existing.color), ('Kia', 'أحمر'))
+        # bulk_update لا يطبق auto_now؛ التصدير يعتمد على updated_at
+        self.assertGreater(self.existing.updated_at, updated_at)
+
+    def test_jsonl_with_default_company(self):
+        fh = io.StringIO(
+            '{"plate_number": "J 1", "brand": "BMW", "model_name": "X5", "description": "-", "daily_price": 300}\n'
+            '\n'
+            'not json\n'
+            '{"plate_number": "J 1", "daily_price": 310}\n'
+        )
+        report = import_fleet(fh, 'jsonl', company=self.company)
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error.line for error in report.errors], [3])
+        car = Car.objects.get(plate_number='J 1')
+        self.assertEqual((car.daily_price, car.rental_company, car.transmission), (310, self.company, 'auto'))
+
+    def test_upload_view(self):
+        admin = User.objects.create_superuser('admin', password='pw')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('fleet.csv', (self.HEADER + 'UP 1,,Ford,Focus,-,70,yes\n').encode())
+
+        response = self.client.post(reverse('vehicles:import_fleet'), {'file': upload, 'rental_company': self.company.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertTrue(Car.objects.get(plate_number='UP 1').is_available)
+
+
+class FacetCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = RentalCompany.objects.create(name='Facet Rentals')
+        Car.objects.create(
+            rental_company=cls.company, brand='Kia', model_name='Rio', description='-',
+            daily_price=90, plate_number='FCT 1', fuel_type='diesel',
+        )
+
+    def counts(self):
+        return facet_counts(Car.objects.all(), ('', ''), dict.fromkeys(['transmission', 'fuel', 'company', 'price']))
+
+    def test_cached_counts_follow_car_changes(self):
+        self.assertEqual(self.counts()['fuel'], {'diesel': 1})
+        car = Car.objects.create(
+            rental_company=self.company, brand='Kia', model_name='Rio', description='-',
+            daily_price=90, plate_number='FCT 2', fuel_type='petrol',
+        )
+        self.assertEqual(self.counts()['fuel'], {'diesel': 1, 'petrol': 1})
+        car.delete()
+        self.assertEqual(self.counts()['fuel'], {'diesel': 1})
+
+    def test_impossible_dates_are_ignored(self):
+        response = self.client.get(reverse('vehicles:car_list'), {'start': '2024-02-30', 'end': '2024-03-05'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['selected_start'], '')
+
+    def test_date_filtered_counts_follow_bookings(self):
+        start = timezone.localdate() + timedelta(days=10)
+        params = {'start': start.isoformat(), 'end': (start + timedelta(days=2)).isoformat()}
+
+        def diesel_count():
+            response = self.client.get(reverse('vehicles:car_list'), params)
+            return dict((value, count) for value, label, count in response.context['fuel_choices'])['diesel']
+
+        self.assertEqual(diesel_count(), 1)
+        Booking.objects.create(
+            user=User.objects.create_user('facet@example.com', password='x'), car=Car.objects.get(),
+            start_date=timezone.now() + timedelta(days=10), end_date=timezone.now() + timedelta(days=11),
+            status='CONFIRMED',
+        )
+        self.assertEqual(diesel_count(), 0)
+
+
+class CarDetailViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Detail Rentals')
+        cls.car = Car.objects.create(
+            rental_company=company, brand='Toyota', model_name='Camry', description='-',
+            daily_price=100, plate_number='DTL 1',
+        )
+        cls.user = User.objects.create_user('detail', password='x')
+
+    def test_review_flag_comes_with_the_car(self):
+        url = reverse('vehicles:car_detail', args=[self.car.pk])
+        self.assertFalse(self.client.get(url).context['user_can_review'])
+
+        self.client.force_login(self.user)
+        # الجلسة والمستخدم، ثم السيارة (مع علم التقييم) وصفحة التقييمات
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertTrue(response.context['user_can_review'])
+
+        CarReview.objects.create(car=self.car, user=self.user, rating=5)
+        response = self.client.get(url)
+        self.assertFalse(response.context['user_can_review'])
+        self.assertEqual(len(response.context['reviews']), 1)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages over a sort key with ties, broken by id."""
+
+    PRICES = [300, 100, 200, 100, 300, 100, 200]
+
+    @classmethod
+    def setUpTestData(cls):
+        company = RentalCompany.objects.create(name='Paging Rentals')
+        for i, price in enumerate(cls.PRICES):
+            Car.objects.create(
+                rental_company=company, brand='Toyota', model_name='Camry', description='-',
+                daily_price=price, plate_number=f'PAG {i}',
+            )
+
+    def walk(self, ordering, per_page=3):
+        """Every page forward, then back again from the last one, as lists of ids."""
+        forward, cursor = [], None
+        while True:
+            page = paginate(Car.objects.all(), ordering, cursor, per_page)
+            forward.append([car.pk for car in page])
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        backward = [forward[-1]]
+        while page.has_previous:
+            page = paginate(Car.objects.all(), ordering, page.previous_cursor, per_page)
+            backward.append([car.pk for car in page])
+        return forward, backward[::-1]
+
+    def test_round_trips_in_both_directions(self):
+        for ordering in (('daily_price', 'id'), ('-daily_price', '-id')):
+            with self.subTest(ordering=ordering):
+                expected = list(Car.objects.order_by(*ordering).values_list('pk', flat=True))
+                forward, backward = self.walk(ordering)
+
+                # الأسعار المتساوية تمتد عبر حدود الصفحات دون تكرار أو فقد
+                self.assertEqual([pk for page in forward for pk in page], expected)
+                self.assertEqual([len(page) for page in forward], [3, 3, 1])
+                self.assertEqual(backward, forward)
+
+    def test_first_and_last_pages(self):
+        first = paginate(Car.objects.all(), ('daily_price', 'id'), None, 3)
+        self.assertFalse(first.has_previous)
+        self.assertTrue(first.has_next)
+        everything = paginate(Car.objects.all(), ('daily_price', 'id'), None, len(self.PRICES))
+        self.assertFalse(everything.has_next)
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        ordering = ('daily_price', 'id')
+        first = [car.pk for car in paginate(Car.objects.all(), ordering, None, 3)]
+        cursors = [
+            'garbage!', 'bm90IGpzb24', encode_cursor(('-created_at', '-id'), ['2024-01-01T00:00:00', 1], 'n'),
+            encode_cursor(ordering, ['100'], 'n'), encode_cursor(ordering, ['100', 1], 'x'),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = paginate(Car.objects.all(), ordering, cursor, 3)
+                self.assertEqual([car.pk for car in page], first)
+                self.assertFalse(page.has_previous)
 
-# Create your tests here.
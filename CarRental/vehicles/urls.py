@@ -8,11 +8,13 @@ urlpatterns = [
     path('', views.car_list, name='car_list'),
 
     path('<int:pk>/', views.car_detail, name='car_detail'),
+    path('<int:pk>/reviews/', views.car_reviews, name='car_reviews'),
     path('<int:car_pk>/add-review/', views.add_car_review, name='add_car_review'),
 
     # --- روابط لوحة الإدارة (للأدمن) ---
     path('manage/', views.manage_cars, name='manage_cars'),
     path('add/', views.add_car, name='add_car'),
+    path('import/', views.import_fleet_view, name='import_fleet'),
     path('edit/<int:pk>/', views.edit_car, name='edit_car'),
     path('delete/<int:pk>/', views.delete_car, name='delete_car'),
 
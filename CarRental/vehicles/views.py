@@ -1,52 +1,133 @@
+import io
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import user_passes_test, login_required
 from .models import Car, RentalCompany, CarReview 
-from .forms import CarForm, RentalCompanyForm, CarReviewForm 
-from django.db.models import Avg, Q 
+from .forms import CarForm, RentalCompanyForm, CarReviewForm, FleetImportForm
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time
 from django.contrib import messages
+from CarRental.pagination import paginate, cursor_querystring
+from .search import search_cars
+from .fleet_import import detect_format, import_fleet
+from .facets import PRICE_BUCKETS, apply_facet_filters, facet_counts, price_bucket_filter
+from bookings.models import Booking
 
 # ---------------------------------------------------------
 # القسم الأول: واجهة المستخدم (للموقع العام)
 # ---------------------------------------------------------
 
+CARS_PER_PAGE = 12
+REVIEWS_PER_PAGE = 10
+
+# كل خيار فرز ينتهي بـ id حتى يكون مفتاح الصفحات (cursor) فريداً
+CAR_SORT_ORDERINGS = {
+    '': ('id',),
+    'price_asc': ('daily_price', 'id'),
+    'price_desc': ('-daily_price', '-id'),
+    'newest': ('-created_at', '-id'),
+    'rating_desc': ('-rating_avg', '-id'),
+}
+
+# عند البحث بدون اختيار فرز: الأكثر صلة أولاً
+RELEVANCE_ORDERING = ('-search_rank', 'id')
+
+def _parse_day(value):
+    # نفس تحويل نموذج الحجز: التاريخ يعني بداية اليوم بالتوقيت الحالي
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        # صيغة صحيحة لكن التاريخ غير موجود (مثل 2024-02-30)
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 def car_list(request):
 
     query = request.GET.get('q')
     transmission_filter = request.GET.get('transmission')
     fuel_filter = request.GET.get('fuel')
+    company_filter = request.GET.get('company')
+    price_filter = request.GET.get('price')
+    min_rating = request.GET.get('min_rating')
+    start_filter = request.GET.get('start')
+    end_filter = request.GET.get('end')
     
     sort_by = request.GET.get('sort_by')
+    if sort_by not in CAR_SORT_ORDERINGS:
+        sort_by = ''
 
-    cars = Car.objects.all()
+    cars = Car.objects.select_related('rental_company')
 
     if query:
-        cars = cars.filter(
-            Q(rental_company__name__icontains=query) | 
-            Q(brand__icontains=query) |
-            Q(model_name__icontains=query)
-        ).distinct()
-
-    if transmission_filter and transmission_filter != 'all':
-        cars = cars.filter(transmission=transmission_filter)
-        
-    if fuel_filter and fuel_filter != 'all':
-        cars = cars.filter(fuel_type=fuel_filter)
-        
-    if sort_by == 'price_asc':
+        cars = search_cars(cars, query)
 
-        cars = cars.order_by('daily_price')
-    elif sort_by == 'price_desc':
+    # التقييم مخزن على السيارة نفسها، فلا حاجة لتجميع لكل صف
+    if min_rating in ('1', '2', '3', '4', '5'):
+        cars = cars.filter(rating_avg__gte=int(min_rating))
 
-        cars = cars.order_by('-daily_price')
+    # استبعاد السيارات المحجوزة في الفترة المطلوبة (NOT EXISTS على الفهرس المركب)
+    start, end = _parse_day(start_filter), _parse_day(end_filter)
+    if start and end and end > start:
+        busy = Booking.objects.filter(
+            car=OuterRef('pk'),
+            status__in=Booking.BLOCKING_STATUSES,
+            start_date__lt=end,
+            end_date__gt=start,
+        )
+        cars = cars.filter(~Exists(busy))
+    else:
+        start = end = None
+
+    selected = {
+        'transmission': transmission_filter if transmission_filter and transmission_filter != 'all' else None,
+        'fuel': fuel_filter if fuel_filter and fuel_filter != 'all' else None,
+        'company': company_filter if company_filter and company_filter.isdigit() else None,
+        'price': price_filter if price_filter and price_bucket_filter(price_filter) else None,
+    }
+
+    # عدادات الفلاتر من استعلام تجميعي واحد، مخزن مؤقتاً حسب البحث إلا مع فترة
+    # تواريخ: الحجوزات تغيّر تلك العدادات ولا تُسقط الذاكرة المؤقتة
+    signature = None if start else (query or '', min_rating or '')
+    facets = facet_counts(cars, signature, selected)
+    cars = apply_facet_filters(cars, selected)
+
+    # ترقيم بالمؤشر: بدون OFFSET وبدون COUNT(*) لكل صفحة
+    ordering = RELEVANCE_ORDERING if query and not sort_by else CAR_SORT_ORDERINGS[sort_by]
+    page = paginate(cars, ordering, request.GET.get('cursor'), CARS_PER_PAGE)
 
     context = {
-        'cars': cars,
+        'cars': page,
+        'page': page,
+        'next_query': cursor_querystring(request, page.next_cursor) if page.has_next else None,
+        'previous_query': cursor_querystring(request, page.previous_cursor) if page.has_previous else None,
         'search_query': query if query else '',
 
         'selected_transmission': transmission_filter,
         'selected_fuel': fuel_filter,
-        'transmission_choices': Car.TRANSMISSION_CHOICES,
-        'fuel_choices': Car.FUEL_CHOICES,
+        'selected_company': company_filter,
+        'selected_price': price_filter,
+        'selected_min_rating': min_rating,
+        'selected_start': start_filter if start else '',
+        'selected_end': end_filter if end else '',
+        'min_rating_choices': ['4', '3', '2', '1'],
+        'transmission_choices': [
+            (value, label, facets['transmission'].get(value, 0)) for value, label in Car.TRANSMISSION_CHOICES
+        ],
+        'fuel_choices': [
+            (value, label, facets['fuel'].get(value, 0)) for value, label in Car.FUEL_CHOICES
+        ],
+        'company_choices': sorted(
+            ((str(pk), name, facets['company'].get(pk, 0)) for pk, name in facets['company_names'].items()),
+            key=lambda choice: choice[1],
+        ),
+        'price_choices': [
+            (key, key, facets['price'].get(key, 0)) for key, low, high in PRICE_BUCKETS
+        ],
 
         'selected_sort': sort_by,
 
@@ -54,23 +135,31 @@ def car_list(request):
             {'value': '', 'label': 'Default'},
             {'value': 'price_asc', 'label': 'Price: Low to High'},
             {'value': 'price_desc', 'label': 'Price: High to Low'},
+            {'value': 'newest', 'label': 'Newest First'},
+            {'value': 'rating_desc', 'label': 'Top Rated'},
         ]
     }
     return render(request, 'vehicles/car_list.html', context)
 
 def car_detail(request, pk):
-    car = get_object_or_404(Car, pk=pk)
+    cars = Car.objects.select_related('rental_company')
+    if request.user.is_authenticated:
+        # هل قيّم المستخدم السيارة؟ في نفس استعلام السيارة بدل exists() منفصل
+        cars = cars.annotate(
+            has_reviewed=Exists(CarReview.objects.filter(car=OuterRef('pk'), user=request.user))
+        )
+    car = get_object_or_404(cars, pk=pk)
     
-    # حساب متوسط التقييمات
-    average_rating = car.reviews.aggregate(Avg('rating'))['rating__avg']
+    # متوسط التقييمات مخزن مسبقاً على السيارة (review_count / rating_avg)
+    average_rating = car.rating_avg
     
-    # جلب جميع التعليقات
-    reviews = CarReview.objects.filter(car=car).order_by('-created_at')
+    # الصفحة الأولى فقط من التعليقات، والباقي عبر car_reviews
+    reviews = _review_page(car.pk, None)
 
     review_form = CarReviewForm()
     
     # التحقق مما إذا كان المستخدم يستطيع إضافة تقييم (لم يقيّم من قبل)
-    user_can_review = request.user.is_authenticated and not CarReview.objects.filter(car=car, user=request.user).exists()
+    user_can_review = request.user.is_authenticated and not car.has_reviewed
     
     context = {
         'car': car,
@@ -81,14 +170,20 @@ def car_detail(request, pk):
     }
     return render(request, 'vehicles/car_detail.html', context)
 
+def _review_page(car_pk, cursor):
+    # المستخدم يُجلب في نفس الاستعلام، وبالأعمدة التي يعرضها القالب فقط
+    reviews = CarReview.objects.filter(car_id=car_pk).select_related('user').only(
+        'rating', 'comment', 'created_at', 'user__username', 'user__first_name'
+    )
+    return paginate(reviews, ('-created_at', '-id'), cursor, REVIEWS_PER_PAGE)
+
+def car_reviews(request, pk):
+    page = _review_page(pk, request.GET.get('cursor'))
+    return render(request, 'vehicles/review_feed.html', {'reviews': page, 'car_pk': pk})
+
 @login_required
 def add_car_review(request, car_pk):
     car = get_object_or_404(Car, pk=car_pk)
-    
-    # منع التقييم المكرر
-    if CarReview.objects.filter(car=car, user=request.user).exists():
-        # يمكنك عرض رسالة خطأ هنا
-        return redirect('vehicles:car_detail', pk=car_pk)
         
     if request.method == 'POST':
         form = CarReviewForm(request.POST)
@@ -96,7 +191,12 @@ def add_car_review(request, car_pk):
             review = form.save(commit=False)
             review.car = car
             review.user = request.user
-            review.save()
+            # منع التقييم المكرر: القيد unique_together يكفي بدل استعلام exists() مسبق
+            try:
+                with transaction.atomic():
+                    review.save()
+            except IntegrityError:
+                pass
             return redirect('vehicles:car_detail', pk=car_pk)
     
     return redirect('vehicles:car_detail', pk=car_pk)
@@ -219,4 +319,36 @@ def delete_car(request, pk):
         car.delete()
         return redirect('vehicles:manage_cars')
     
-    return render(request, 'vehicles/confirm_delete.html', {'car': car})
\ No newline at end of file
+    return render(request, 'vehicles/confirm_delete.html', {'car': car})
+
+
+# 5. استيراد أسطول كامل من ملف (CSV أو JSON Lines)
+FLEET_IMPORT_ERRORS_SHOWN = 200
+
+@user_passes_test(is_admin)
+def import_fleet_view(request):
+    report = None
+    if request.method == 'POST':
+        form = FleetImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            fmt = detect_format(upload.name)
+            if fmt is None:
+                form.add_error('file', 'صيغة الملف غير مدعومة (CSV أو JSON Lines).')
+            else:
+                # الملفات الكبيرة يحفظها Django في ملف مؤقت، والقراءة سطراً بسطر
+                fh = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+                try:
+                    report = import_fleet(fh, fmt, company=form.cleaned_data['rental_company'])
+                except UnicodeDecodeError:
+                    # الدفعات التي سبقت الخطأ حُفظت
+                    form.add_error('file', 'الملف يجب أن يكون بترميز UTF-8 (توقف الاستيراد عند أول خطأ ترميز).')
+    else:
+        form = FleetImportForm()
+
+    return render(request, 'vehicles/import_fleet.html', {
+        'form': form,
+        'report': report,
+        'errors': report.errors[:FLEET_IMPORT_ERRORS_SHOWN] if report else [],
+        'title': 'استيراد أسطول من ملف',
+    })